@@ -1,16 +1,46 @@
 import discord
 from discord import app_commands
 import asyncio
+import heapq
+import hashlib
+import hmac
+import gzip
 from datetime import timedelta
 import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field, asdict
+from typing import Literal
 import os
+import random
+import secrets
+import re
+import logging
+import logging.handlers
+import queue
+import sys
 import json
-import requests
-from requests.exceptions import HTTPError
-from flask import Flask, request, redirect, url_for, render_template_string, session, abort
-import threading
-from functools import wraps 
+try:
+    import orjson
+    json_loads = orjson.loads # Several times faster than json.loads on Discord's small payloads
+    # aiohttp's json_serialize must return str; int dict keys are stringified as json.dumps does
+    json_dumps = lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    json_loads = json.loads
+    json_dumps = lambda obj: json.dumps(obj, separators=(',', ':')) # Same compact output as orjson
+import aiohttp
+import ahocorasick
+from quart import Quart, request, redirect, url_for, session, render_template, g
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from quart.sessions import SecureCookieSessionInterface
+from functools import wraps, lru_cache
 from urllib.parse import urlencode
+from hypercorn.asyncio import serve
+from hypercorn.middleware import ProxyFixMiddleware
+from hypercorn.config import Config as HypercornConfig
+
+# Runtime diagnostics go through logging (lazy %-formatting); startup banners stay as print()
+logger = logging.getLogger('hyperos')
 
 # --- 1. CONFIGURATION ---
 # IMPORTANT: Use environment variables for sensitive data in production.
@@ -18,27 +48,123 @@ from urllib.parse import urlencode
 BOT_TOKEN = os.getenv('DISCORD_TOKEN')
 GUILD_ID = 1448175320531468402 # Hardcoded Guild ID for HyperOS server
 MOD_ROLE_ID = 1448175664795746398 # Hardcoded Moderator Role ID
+GUILD_OBJECT = discord.Object(id=GUILD_ID) # Reused for command tree registration/sync
 
 # --- DISCORD OAUTH2 CONFIGURATION ---
 DISCORD_CLIENT_ID = os.getenv('DISCORD_CLIENT_ID', '123456789012345678')
 DISCORD_CLIENT_SECRET = os.getenv('DISCORD_CLIENT_SECRET', 'your_super_secret_client_secret')
 DASHBOARD_ADMIN_USER_ID = os.getenv('DASHBOARD_ADMIN_USER_ID', '123456789012345678') 
+DASHBOARD_ADMIN_UID = int(DASHBOARD_ADMIN_USER_ID) if DASHBOARD_ADMIN_USER_ID.isdigit() else None # Parsed once for int compares
 
 # --- FALLBACK LOGIN ---
-FALLBACK_PASSPHRASE = os.getenv('FALLBACK_PASSPHRASE', 'clyde0805') 
+# Only the digest is kept in memory; fixed-size digests also keep the compare from leaking the length
+FALLBACK_HASH = hashlib.blake2b(os.getenv('FALLBACK_PASSPHRASE', 'clyde0805').encode(), digest_size=16).digest()
+
+# --- WEB SERVER ---
+WEB_PORT = int(os.getenv('PORT', 5000))
+WEB_SECRET_KEY = os.getenv('FLASK_SECRET_KEY') # Session signing key; a random one is generated when unset
+# Reverse proxies in front of the app (Render adds one). Their X-Forwarded-* headers supply the client
+# address and scheme; set to 0 when serving directly, or clients could spoof their address.
+PROXY_TRUSTED_HOPS = int(os.getenv('PROXY_TRUSTED_HOPS', 1))
+# Marks the session cookie Secure. On by default (Render serves HTTPS); set to 0 when the dashboard is
+# reached over plain HTTP, or browsers won't send the cookie back and logins never stick.
+SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', '1') != '0'
+
+# --- PERSISTENCE ---
+# Mount path of a persistent disk. Render and Procfile hosts wipe the app directory on every deploy or
+# restart, so without one the configuration only lives in memory.
+DATA_DIR = os.getenv('DATA_DIR')
+CONFIG_STORE_PATH = os.path.join(DATA_DIR, 'config.json') if DATA_DIR else None # Write-through copy of CONFIG_CACHE
+
+# --- TEMPORARY BANS ---
+TEMPBAN_STORE_PATH = os.path.join(DATA_DIR, 'tempbans.json') if DATA_DIR else None # Pending unbans survive restarts
+UNBAN_RETRY_DELAY = 60 # Seconds before a failed unban is attempted again
+MAX_TEMPBAN_DAYS = 365 # Matches the dashboard form's max
+
+# --- TIMEOUTS ---
+TimeoutUnit = Literal['minutes', 'hours', 'days'] # discord.py turns this into fixed slash-command choices
+UNIT_SECONDS = {'minutes': 60, 'hours': 3600, 'days': 86400} # Duration unit -> seconds
+MAX_TIMEOUT_SECONDS = 28 * 86400 # Discord's timeout limit
+MAX_BULK_MUTE = 10 # Dashboard mutes in one submit; member edits share a per-guild rate limit
+
+def duration_to_seconds(duration, unit):
+    """Converts a duration in the given unit to seconds (0 for an unknown unit)."""
+    multiplier = UNIT_SECONDS.get(unit)
+    return duration * multiplier if multiplier else 0
+
+# --- VALIDATION ---
+def is_snowflake(value: str) -> bool:
+    """True for a Discord ID: 17-20 ASCII digits (str.isdigit alone also accepts e.g. full-width digits)."""
+    return 17 <= len(value) <= 20 and value.isascii() and value.isdigit()
+
+# --- REACTION ROLES ---
+MAX_RR_MESSAGES = 1024 # Oldest reaction-role message is dropped past this many
+MESSAGE_LINK_RE = re.compile(r'/channels/\d+/(\d+)/(\d+)\b') # .../channels/<guild>/<channel>/<message>
+
+def canonical_emoji(emoji: str | discord.PartialEmoji) -> str:
+    """Reaction-role lookup key: the ID for custom emoji (their name and animated flag can change), else the unicode text."""
+    if isinstance(emoji, str):
+        emoji = discord.PartialEmoji.from_str(emoji)
+    return sys.intern(str(emoji.id) if emoji.id else emoji.name)
+
+# --- EMBED COLORS ---
+# Built once at import instead of allocating a new Color on every logged event
+COLOR_DELETE = discord.Color.red()
+COLOR_EDIT = discord.Color.orange()
+COLOR_FILTER = discord.Color.dark_red()
+COLOR_STATUS = discord.Color.blurple()
+LOG_MESSAGE_MAX_CHARS = 6000 # Discord's cap on the combined text of all embeds in one message
+
+def build_log_embed(title: str, description: str, color: discord.Color, author, channel, *fields: tuple[str, str, bool]) -> discord.Embed:
+    """Log-channel embed with the shared User/Channel fields followed by (name, value, inline) extras.
+
+    Empty values (e.g. the before-text of an attachment-only message) get a placeholder, as Discord rejects them."""
+    embed = discord.Embed(title=title, description=description, color=color, timestamp=discord.utils.utcnow())
+    embed.add_field(name="User", value=f"{author.name} ({author.id})", inline=True)
+    embed.add_field(name="Channel", value=channel.name, inline=True)
+    for name, value, inline in fields:
+        embed.add_field(name=name, value=value or "*No content*", inline=inline)
+    return embed
 
 # --- API & URLS ---
 REDIRECT_URI = "https://hyperos-bot.onrender.com/oauth_callback" 
 DISCORD_API_BASE_URL = 'https://discord.com/api/v10'
-
-# Global variables for in-memory configuration cache
-CONFIG_CACHE = {
-    GUILD_ID: {
-        'log_channel_id': None, 
-        'word_filter_list': ["badword", "anotherbadword"], # Initial word list
-        'reaction_roles': {} # {message_id: {emoji_name: role_id}}
-    }
-} 
+DISCORD_TOKEN_URL = f"{DISCORD_API_BASE_URL}/oauth2/token"
+DISCORD_USER_URL = f"{DISCORD_API_BASE_URL}/users/@me"
+# REST prefixes are formatted once here (the guild is fixed); call sites only append the variable tail
+DISCORD_GUILD_URL = f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}"
+DISCORD_MEMBERS_URL = f"{DISCORD_GUILD_URL}/members"
+DISCORD_BANS_URL = f"{DISCORD_GUILD_URL}/bans"
+DISCORD_CHANNELS_URL = f"{DISCORD_API_BASE_URL}/channels"
+DISCORD_WEBHOOKS_URL = f"{DISCORD_API_BASE_URL}/webhooks"
+API_USER_AGENT = 'DiscordBot (https://hyperos-bot.onrender.com, 1.0)' # Format Discord asks API clients to send
+# Built once from constants; urlencode also percent-encodes the redirect URI
+OAUTH_URL = "https://discord.com/oauth2/authorize?" + urlencode({
+    'client_id': DISCORD_CLIENT_ID,
+    'redirect_uri': REDIRECT_URI,
+    'response_type': 'code',
+    'scope': 'identify',
+})
+# Every field of the token-exchange form except the per-login code
+OAUTH_TOKEN_FORM = {
+    'client_id': DISCORD_CLIENT_ID,
+    'client_secret': DISCORD_CLIENT_SECRET,
+    'grant_type': 'authorization_code',
+    'redirect_uri': REDIRECT_URI,
+    'scope': 'identify',
+}
+OAUTH_TOKEN_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+@dataclass(slots=True)
+class GuildConfig:
+    """Per-guild settings; slot attributes instead of nested dict lookups on the hot paths."""
+    log_channel_id: int | None = None
+    word_filter_list: list = field(default_factory=lambda: ["badword", "anotherbadword"]) # Initial word list
+    reaction_roles: dict = field(default_factory=dict) # {message_id (int): {emoji_name: role_id (int)}}
+
+# Global variables for in-memory configuration cache.
+# Everything, dashboard handlers included, runs on the bot loop, so reads and writes never race.
+CONFIG_CACHE = {GUILD_ID: GuildConfig()}
 
 # Define the custom Bot class
 class HyperOSBot(discord.Client):
@@ -46,206 +172,511 @@ class HyperOSBot(discord.Client):
     def __init__(self, *, intents: discord.Intents):
         super().__init__(intents=intents)
         self.tree = app_commands.CommandTree(self)
-        self.muted_users = {} # {user_id: unmute_timestamp (float)}
+        self._web_task = None
+        self._web_shutdown = asyncio.Event()
+        self._pending_deletes = defaultdict(list) # {channel_id: [discord.Message]}
+        self._delete_flush_task = None
+        self._log_queue = asyncio.Queue(maxsize=1000) # Embeds waiting for the log channel
+        self._log_flush_task = None
+        self._role_ops = defaultdict(dict) # {member_id: {role_id: True (add) / False (remove)}}, last reaction wins
+        self._role_members = {} # {member_id: discord.Member} from add payloads, used when the member cache misses
+        self._role_flush_task = None
+        self._ban_heap = [] # [(unban_timestamp, user_id)], earliest expiry first
+        self._ban_wake = asyncio.Event()
+        self._ban_timer = None # loop.call_later handle that sets _ban_wake at the earliest expiry
+        self._unban_task = None
+        self.hyperos_guild = None # Cached discord.Guild for GUILD_ID, refreshed on every ready
+        self.api_session = None # Shared aiohttp session for dashboard/OAuth REST calls, bound to this loop
+        # Flat reaction-role index mirrored from CONFIG_CACHE for the reaction hot path
+        self.rr_map = {} # {(message_id, canonical_emoji(emoji)): role_id}
+        self.rr_msg_ids = set() # Message IDs with at least one binding (fast early-out)
+        self._filter_automaton = None # Aho-Corasick automaton over the word filter; None when the list is empty
+
+    async def setup_hook(self):
+        # Keep-alive pool to discord.com; per-request timeout, retries are capped by _discord_request
+        self.api_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=8, connect=3.05),
+            headers={'User-Agent': API_USER_AGENT},
+            json_serialize=json_dumps, # Request bodies (json=...) encode with orjson too
+        )
+
+        # Runs exactly once per process, unlike on_ready which fires again on every reconnect
+        try:
+            await self.tree.sync(guild=GUILD_OBJECT)
+            print(f"Synced commands to HyperOS server.")
+        except Exception as e:
+            logger.error("Error syncing commands: %s", e)
+
+        self._load_initial_config()
+
+        # The dashboard shares the bot's event loop instead of running on its own thread
+        self._web_task = asyncio.create_task(run_web_server(shutdown_trigger=self._web_shutdown.wait))
+        self._web_task.add_done_callback(self._on_web_task_done)
+        self._delete_flush_task = asyncio.create_task(self._flush_deletes_loop())
+        self._log_flush_task = asyncio.create_task(self._flush_log_loop())
+        self._role_flush_task = asyncio.create_task(self._flush_role_ops_loop())
+        self._load_tempbans()
+        self._unban_task = asyncio.create_task(self._unban_sweeper())
+
+    @staticmethod
+    def _on_web_task_done(task: asyncio.Task):
+        """Logs a web server crash (e.g. the port bind failing) as it happens instead of only at shutdown."""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Web server stopped unexpectedly", exc_info=task.exception())
+
+    async def close(self):
+        self._web_shutdown.set()
+        if self._web_task:
+            # A crashed server was already logged by its done-callback; it must not stop the rest of the shutdown
+            await asyncio.gather(self._web_task, return_exceptions=True)
+        if self.api_session:
+            await self.api_session.close()
+        await super().close()
 
     async def on_ready(self):
         print(f'Logged in as {self.user} (ID: {self.user.id})')
-        await self._load_initial_config()
+        # A full reconnect can replace the Guild object, so re-resolve on every ready
+        self.hyperos_guild = self.get_guild(GUILD_ID)
+        # discord.py switches to orjson for gateway payloads automatically when it is installed
+        print(f"Gateway JSON decoder: {'orjson' if discord.utils.HAS_ORJSON else 'stdlib json'}")
+
+    def _load_initial_config(self):
+        """Restores the saved configuration over the defaults and rebuilds the reaction-role index."""
+        if CONFIG_STORE_PATH is None:
+            logger.warning("DATA_DIR not set; configuration is kept in memory only and lost on restart.")
+        else:
+            self._read_config_store()
 
+        for message_id, emoji_map in CONFIG_CACHE[GUILD_ID].reaction_roles.items():
+            for emoji, role_id in emoji_map.items():
+                self.rr_map[(message_id, canonical_emoji(emoji))] = role_id
+            self.rr_msg_ids.add(message_id)
+        self._rebuild_word_filter()
+        print("✅ Configuration cache ready.")
+
+    def _read_config_store(self):
+        """Replaces the default configuration with the one saved at CONFIG_STORE_PATH, if any."""
         try:
-            guild = discord.Object(id=GUILD_ID)
-            self.tree.copy_global_to(guild=guild)
-            await self.tree.sync(guild=guild)
-            print(f"Synced commands to HyperOS server.")
+            with open(CONFIG_STORE_PATH, encoding='utf-8') as f:
+                config = GuildConfig(**json_loads(f.read()))
+            # JSON object keys are always strings; restore the int IDs once here
+            config.reaction_roles = {int(mid): {emoji: int(rid) for emoji, rid in emoji_map.items()}
+                                     for mid, emoji_map in config.reaction_roles.items()}
+            CONFIG_CACHE[GUILD_ID] = config
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            print(f"Error syncing commands: {e}")
+            logger.error("Error loading configuration: %s", e)
 
-    async def _load_initial_config(self):
-        """Initializes in-memory configuration cache with defaults."""
-        print("✅ Configuration cache ready.")
+    def _save_config(self):
+        """Writes the configuration cache to disk. Must run on the bot loop so writes never interleave."""
+        if CONFIG_STORE_PATH is None: return
+        try:
+            tmp_path = f"{CONFIG_STORE_PATH}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f: # orjson writes emoji unescaped
+                f.write(json_dumps(asdict(CONFIG_CACHE[GUILD_ID])))
+            os.replace(tmp_path, CONFIG_STORE_PATH)
+        except Exception as e:
+            logger.error("Error saving configuration: %s", e)
+
+    def apply_dashboard_config(self, log_channel_id: int | None, word_filter_list: list):
+        """Applies a dashboard config form; the handler runs on the bot loop, where every other CONFIG_CACHE write happens."""
+        CONFIG_CACHE[GUILD_ID].log_channel_id = log_channel_id
+        self.set_word_filter_list(word_filter_list)
+
+    def set_log_channel_id(self, channel_id: int | None):
+        """Sets the moderation log channel and saves the config."""
+        CONFIG_CACHE[GUILD_ID].log_channel_id = channel_id
+        self._save_config()
+
+    def set_word_filter_list(self, words: list):
+        """Replaces the word filter, rebuilds its automaton and saves the config."""
+        CONFIG_CACHE[GUILD_ID].word_filter_list = words
+        self._rebuild_word_filter()
+        self._save_config()
+
+    def _rebuild_word_filter(self):
+        """Compiles the word filter into one automaton so on_message scans each message once for all words."""
+        # Normalize here too, so a hand-edited config file can't hold words on_message would never match
+        words = {w.strip().lower() for w in CONFIG_CACHE[GUILD_ID].word_filter_list} - {''}
+        if not words:
+            self._filter_automaton = None
+            return
+        automaton = ahocorasick.Automaton()
+        for word in words:
+            automaton.add_word(word, word)
+        automaton.make_automaton()
+        self._filter_automaton = automaton
+
+    def bind_reaction_role(self, message_id: int, emoji: str, role_id: int) -> list[int]:
+        """Records a reaction-role binding, evicting the least recently configured message past MAX_RR_MESSAGES.
+
+        Returns the IDs of messages whose bindings were evicted."""
+        rr_config = CONFIG_CACHE[GUILD_ID].reaction_roles
+        # dicts keep insertion order: re-inserting marks the message as most recently configured
+        emoji_map = rr_config.pop(message_id, {})
+        emoji_map[emoji] = role_id
+        rr_config[message_id] = emoji_map
+
+        evicted = []
+        while len(rr_config) > MAX_RR_MESSAGES:
+            old_id = next(iter(rr_config))
+            old_map = rr_config.pop(old_id)
+            evicted.append(old_id)
+            logger.warning("Reaction-role limit (%s messages) reached, dropped bindings for message %s", MAX_RR_MESSAGES, old_id)
+            self.rr_msg_ids.discard(old_id)
+            for old_emoji in old_map:
+                self.rr_map.pop((old_id, canonical_emoji(old_emoji)), None)
+
+        self.rr_map[(message_id, canonical_emoji(emoji))] = role_id
+        self.rr_msg_ids.add(message_id)
+        self._save_config()
+        return evicted
 
     def get_log_channel(self) -> discord.TextChannel | None:
         """Retrieves the configured log channel object."""
         config = CONFIG_CACHE.get(GUILD_ID)
-        if config and config['log_channel_id']:
-            return self.get_channel(int(config['log_channel_id']))
+        if config and config.log_channel_id:
+            return self.get_channel(config.log_channel_id)
         return None
 
+    # --- TEMPORARY BAN SCHEDULER ---
+    # One sweeper task sleeps until the earliest expiry instead of one sleeping task per ban.
+
+    def _load_tempbans(self):
+        """Restores pending unbans saved before the last restart."""
+        if TEMPBAN_STORE_PATH is None:
+            logger.warning("DATA_DIR not set; pending temporary bans are kept in memory only "
+                           "and become permanent if the bot restarts before they expire.")
+            return
+        try:
+            with open(TEMPBAN_STORE_PATH) as f:
+                self._ban_heap = [(float(ts), int(uid)) for ts, uid in json_loads(f.read())]
+            heapq.heapify(self._ban_heap)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error("Error loading temporary bans: %s", e)
+
+    def _save_tempbans(self):
+        """Persists pending unbans so they are still lifted after a restart."""
+        if TEMPBAN_STORE_PATH is None: return
+        try:
+            tmp_path = f"{TEMPBAN_STORE_PATH}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(json_dumps(self._ban_heap))
+            os.replace(tmp_path, TEMPBAN_STORE_PATH) # A crash mid-write must not lose every pending unban
+        except Exception as e:
+            logger.error("Error saving temporary bans: %s", e)
+
+    def schedule_unban(self, user_id: int, unban_at: float):
+        """Queues an unban for user_id at the given UNIX timestamp. Must run on the bot loop."""
+        self.cancel_unban(user_id)
+        heapq.heappush(self._ban_heap, (unban_at, user_id))
+        self._save_tempbans()
+        self._ban_wake.set()
+
+    def cancel_unban(self, user_id: int):
+        """Drops any pending unban for user_id (manual unban or permanent ban). Must run on the bot loop."""
+        remaining = [entry for entry in self._ban_heap if entry[1] != user_id]
+        if len(remaining) != len(self._ban_heap):
+            heapq.heapify(remaining)
+            self._ban_heap = remaining
+            self._save_tempbans()
+
+    async def _unban_sweeper(self):
+        """Lifts temporary bans as they expire."""
+        await self.wait_until_ready()
+        while True:
+            now = time.time()
+            expired = False
+            retry = []
+            while self._ban_heap and self._ban_heap[0][0] <= now:
+                _, user_id = heapq.heappop(self._ban_heap)
+                expired = True
+                try:
+                    await self.hyperos_guild.unban(discord.Object(id=user_id), reason="Temporary ban expired.")
+                except discord.NotFound:
+                    pass # Already unbanned manually
+                except Exception as e:
+                    # 5xx, rate limits, or the guild not cached yet: keep the entry so the ban doesn't become permanent
+                    logger.error("Error lifting temporary ban for %s, retrying in %ss: %s", user_id, UNBAN_RETRY_DELAY, e)
+                    retry.append(user_id)
+            for user_id in retry: # Pushed back after the pass so a failing entry isn't retried in a tight loop
+                heapq.heappush(self._ban_heap, (now + UNBAN_RETRY_DELAY, user_id))
+            if expired:
+                self._save_tempbans()
+
+            # One timer handle on the loop's heap instead of a wait_for wrapper per cycle
+            self._ban_wake.clear()
+            if self._ban_timer:
+                self._ban_timer.cancel()
+                self._ban_timer = None
+            if self._ban_heap:
+                delay = max(0, self._ban_heap[0][0] - time.time())
+                self._ban_timer = asyncio.get_running_loop().call_later(delay, self._ban_wake.set)
+            await self._ban_wake.wait()
+
     # --- EVENT LISTENERS (Logging and Reaction Roles) ---
 
-    async def _send_log_embed(self, embed: discord.Embed):
-        """Sends an embed to the configured moderation log channel."""
-        log_channel = self.get_log_channel()
-        if log_channel:
+    def _send_log_embed(self, embed: discord.Embed):
+        """Queues an embed for the moderation log channel (dropped if the queue is full)."""
+        try:
+            self._log_queue.put_nowait(embed)
+        except asyncio.QueueFull:
+            logger.warning("Log queue full, dropping embed: %s", embed.title)
+
+    async def _flush_log_loop(self):
+        """Posts queued log embeds, packed within Discord's per-message limits (10 embeds, 6000 chars in total)."""
+        carry = None # Embed that didn't fit the previous message; it opens the next one
+        while True:
+            embeds = [carry or await self._log_queue.get()]
+            carry = None
+            await asyncio.sleep(0.5) # Flush window: let a burst (raid, mass delete) pile up
+            total = len(embeds[0])
+            while len(embeds) < 10 and not self._log_queue.empty():
+                embed = self._log_queue.get_nowait()
+                if total + len(embed) >= LOG_MESSAGE_MAX_CHARS:
+                    carry = embed
+                    break
+                embeds.append(embed)
+                total += len(embed)
+
+            log_channel = self.get_log_channel()
+            if not log_channel:
+                continue
             try:
-                await log_channel.send(embed=embed)
+                await log_channel.send(embeds=embeds)
             except discord.Forbidden:
-                print(f"Error: Cannot send message to log channel {log_channel.name}")
+                logger.warning("Cannot send message to log channel %s", log_channel.name)
+            except discord.HTTPException as e:
+                if e.status != 400 or len(embeds) == 1:
+                    logger.error("Error sending log embed: %s", e)
+                    continue
+                # One malformed embed fails the whole message: send them singly so only that one is lost
+                for embed in embeds:
+                    try:
+                        await log_channel.send(embed=embed)
+                    except Exception as e:
+                        logger.error("Error sending log embed %s: %s", embed.title, e)
             except Exception as e:
-                print(f"Error sending log embed: {e}")
+                logger.error("Error sending log embed: %s", e)
 
     async def on_message_delete(self, message: discord.Message):
         """Logs message deletions."""
-        if message.author.bot or not message.guild or message.guild.id != GUILD_ID: return
-        embed = discord.Embed(title="🗑️ Message Deleted", description=f"Message by {message.author.mention} deleted in {message.channel.mention}", color=discord.Color.red(), timestamp=discord.utils.utcnow())
-        embed.add_field(name="User", value=f"{message.author.name} ({message.author.id})", inline=True)
-        embed.add_field(name="Channel", value=message.channel.name, inline=True)
+        # Nothing to build an embed for until a log channel is configured
+        if CONFIG_CACHE[GUILD_ID].log_channel_id is None: return
+        author = message.author
+        guild = message.guild
+        if author.bot or guild is None or guild.id != GUILD_ID: return
+        channel = message.channel
         content = message.content or "*No content*"
-        embed.add_field(name="Content", value=content[:1024], inline=False)
-        await self._send_log_embed(embed)
+        self._send_log_embed(build_log_embed(
+            "🗑️ Message Deleted", f"Message by {author.mention} deleted in {channel.mention}", COLOR_DELETE, author, channel,
+            ("Content", content[:1024], False)))
 
     async def on_message_edit(self, before: discord.Message, after: discord.Message):
         """Logs message edits."""
-        if before.author.bot or not before.guild or before.guild.id != GUILD_ID or before.content == after.content: return
-        embed = discord.Embed(title="📝 Message Edited", description=f"Message edited by {before.author.mention} in {before.channel.mention}", color=discord.Color.orange(), timestamp=discord.utils.utcnow())
-        embed.add_field(name="User", value=f"{before.author.name} ({before.author.id})", inline=True)
-        embed.add_field(name="Channel", value=before.channel.name, inline=True)
-        embed.add_field(name="Before", value=before.content[:1024], inline=False)
-        embed.add_field(name="After", value=after.content[:1024], inline=False)
-        await self._send_log_embed(embed)
+        # Embed unfurls and pins arrive as edits with unchanged content: drop those before touching author/guild
+        before_content, after_content = before.content, after.content
+        if before_content == after_content: return
+        if CONFIG_CACHE[GUILD_ID].log_channel_id is None: return
+        author = before.author
+        guild = before.guild
+        if author.bot or guild is None or guild.id != GUILD_ID: return
+        channel = before.channel
+        self._send_log_embed(build_log_embed(
+            "📝 Message Edited", f"Message edited by {author.mention} in {channel.mention}", COLOR_EDIT, author, channel,
+            ("Before", before_content[:1024], False), ("After", after_content[:1024], False)))
     
-    # Reaction role listeners (unchanged)
+    # The gateway tells us when the dashboard's cached channel list goes stale
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        if channel.guild.id == GUILD_ID: invalidate_channel_cache()
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        if channel.guild.id == GUILD_ID: invalidate_channel_cache()
+
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        # Only name and ordering are shown; permission or topic edits keep the cache
+        if after.guild.id == GUILD_ID and (before.name != after.name or before.position != after.position):
+            invalidate_channel_cache()
+
+    # Reaction role listeners: most reactions are on unrelated messages, so the set miss comes first
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        if payload.guild_id != GUILD_ID or payload.member.bot: return
-        rr_config = CONFIG_CACHE.get(GUILD_ID, {}).get('reaction_roles', {})
-        if str(payload.message_id) in rr_config:
-            message_map = rr_config[str(payload.message_id)]
-            emoji_id = str(payload.emoji)
-            if emoji_id in message_map:
-                role_id = message_map[emoji_id]
-                guild = self.get_guild(payload.guild_id)
-                role = guild.get_role(int(role_id))
-                if role and payload.member:
-                    try:
-                        await payload.member.add_roles(role)
-                    except discord.Forbidden:
-                        print(f"Error: Missing permissions to add role {role.name}")
+        if payload.message_id not in self.rr_msg_ids or payload.guild_id != GUILD_ID or payload.member.bot: return
+        role_id = self.rr_map.get((payload.message_id, canonical_emoji(payload.emoji)))
+        if role_id is None: return
+
+        # Queued instead of awaited; the flush loop applies each member's net changes
+        self._role_ops[payload.user_id][role_id] = True
+        self._role_members[payload.user_id] = payload.member
     
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
-        if payload.guild_id != GUILD_ID: return
-        rr_config = CONFIG_CACHE.get(GUILD_ID, {}).get('reaction_roles', {})
-        if str(payload.message_id) in rr_config:
-            message_map = rr_config[str(payload.message_id)]
-            emoji_id = str(payload.emoji)
-            if emoji_id in message_map:
-                role_id = message_map[emoji_id]
-                guild = self.get_guild(payload.guild_id)
-                member = guild.get_member(payload.user_id)
-                role = guild.get_role(int(role_id))
-                if role and member:
-                    try:
-                        await member.remove_roles(role)
-                    except discord.Forbidden:
-                        print(f"Error: Missing permissions to remove role {role.name}")
+        if payload.message_id not in self.rr_msg_ids or payload.guild_id != GUILD_ID: return
+        role_id = self.rr_map.get((payload.message_id, canonical_emoji(payload.emoji)))
+        if role_id is None: return
+
+        self._role_ops[payload.user_id][role_id] = False
+
+    async def _flush_role_ops_loop(self):
+        """Applies queued reaction-role changes roughly once per second."""
+        while True:
+            await asyncio.sleep(1)
+            ops, self._role_ops = self._role_ops, defaultdict(dict)
+            members, self._role_members = self._role_members, {}
+            for member_id, changes in ops.items():
+                # Network errors (OSError, aiohttp) escape discord.py's retries; one must not end the task
+                try:
+                    await self._apply_role_ops(member_id, changes, members.get(member_id))
+                except Exception as e:
+                    logger.error("Error applying reaction roles for %s: %s", member_id, e)
+
+    async def _apply_role_ops(self, member_id: int, changes: dict, fallback: discord.Member | None = None):
+        """Nets a member's queued role adds/removes against their current roles and applies only the difference."""
+        guild = self.hyperos_guild
+        member = guild.get_member(member_id) if guild else None
+        member = member or fallback # The cache can miss while the guild is still chunking; adds carry the member
+        if member is None:
+            logger.warning("Member %s not cached, dropping reaction-role changes: %s", member_id, changes)
+            return
+
+        # Only changes against the current roles are sent, so a react/unreact pair inside one window touches no API
+        current = {role.id for role in member.roles}
+        added, removed = [], []
+        for role_id, add in changes.items():
+            # Bindings can outlive their role; skip IDs the guild no longer has
+            if guild is None or guild.get_role(role_id) is None: continue
+            if add and role_id not in current:
+                added.append(discord.Object(role_id))
+            elif not add and role_id in current:
+                removed.append(discord.Object(role_id))
+
+        # Per-role PUT/DELETE calls leave roles changed elsewhere in the meantime untouched
+        try:
+            if added:
+                await member.add_roles(*added, reason="Reaction roles")
+            if removed:
+                await member.remove_roles(*removed, reason="Reaction roles")
+        except discord.Forbidden:
+            logger.warning("Missing permissions to update reaction roles for %s", member)
+        except discord.HTTPException as e:
+            logger.error("Error updating reaction roles for %s: %s", member, e)
 
 
-    # --- MESSAGE HANDLING (MUTE ENFORCEMENT & WORD FILTER) ---
+    # --- MESSAGE HANDLING (WORD FILTER) ---
+    # Mutes are enforced server-side by Discord's timeout, so only the filter runs here.
     async def on_message(self, message: discord.Message):
-        """Checks for mute status and filtered words, deleting messages if necessary."""
-        if message.author.bot or not message.guild or message.guild.id != GUILD_ID: return
-
-        # 1. Mute Enforcement
-        unmute_time = self.muted_users.get(message.author.id)
-        if unmute_time:
-            if time.time() < unmute_time:
-                try:
-                    await message.delete()
-                    print(f"Deleted muted user's message: {message.author.name}")
-                    return # Stop processing if deleted due to mute
-                except discord.Forbidden:
-                    print(f"Error: Missing permissions to delete message (mute) in {message.channel.name}")
-                except Exception:
-                    pass
-            else:
-                if message.author.id in self.muted_users:
-                    del self.muted_users[message.author.id]
-
-        # 2. Word Filter
-        filter_list = CONFIG_CACHE[GUILD_ID]['word_filter_list']
-        content_lower = message.content.lower()
-
-        is_filtered = False
-        filtered_word = None
-        for word in filter_list:
-            if word and word in content_lower:
-                is_filtered = True
-                filtered_word = word
-                break
-
-        if is_filtered:
+        """Checks for filtered words, deleting messages if necessary."""
+        # Word Filter: with no words configured there is nothing to check, so bail before any attribute access
+        automaton = self._filter_automaton
+        if automaton is None: return
+        author = message.author
+        guild = message.guild
+        if author.bot or guild is None or guild.id != GUILD_ID: return
+
+        # One pass over the text finds any filtered word; the first hit is enough
+        content = message.content
+        match = next(automaton.iter(content.lower()), None)
+        if match:
+            filtered_word = match[1]
+            channel = message.channel
+            # Queue the delete; the flush loop removes them with one bulk-delete call per channel
+            pending = self._pending_deletes[channel.id]
+            pending.append(message)
+            if len(pending) >= 100:
+                await self._flush_deletes(channel.id)
+
+            # Log the filter action
+            if CONFIG_CACHE[GUILD_ID].log_channel_id is None: return
+            self._send_log_embed(build_log_embed(
+                "🚫 Filter Violation", f"{author.mention}'s message was deleted for violating the word filter.", COLOR_FILTER, author, channel,
+                ("Content (Deleted)", content[:1000], False), ("Trigger Word", filtered_word, True)))
+
+    async def _flush_deletes_loop(self):
+        """Flushes queued filter deletes roughly once per second."""
+        while True:
+            await asyncio.sleep(1)
+            for channel_id in list(self._pending_deletes):
+                await self._flush_deletes(channel_id)
+
+    async def _flush_deletes(self, channel_id: int):
+        """Deletes a channel's queued messages in batches of up to 100 (the bulk-delete limit)."""
+        messages = self._pending_deletes.pop(channel_id, [])
+        for i in range(0, len(messages), 100):
+            batch = messages[i:i + 100]
+            channel = batch[0].channel
             try:
-                await message.delete()
-                
-                # Log the filter action
-                embed = discord.Embed(title="🚫 Filter Violation", 
-                                      description=f"{message.author.mention}'s message was deleted for violating the word filter.", 
-                                      color=discord.Color.dark_red(), 
-                                      timestamp=discord.utils.utcnow())
-                embed.add_field(name="User", value=f"{message.author.name} ({message.author.id})", inline=True)
-                embed.add_field(name="Channel", value=message.channel.name, inline=True)
-                embed.add_field(name="Content (Deleted)", value=message.content[:1000], inline=False)
-                embed.add_field(name="Trigger Word", value=filtered_word, inline=True)
-                await self._send_log_embed(embed)
-                
+                await channel.delete_messages(batch, reason="Word filter violation")
             except discord.Forbidden:
-                print(f"Error: Missing permissions to delete message (filter) in {message.channel.name}")
+                logger.warning("Missing permissions to delete message (filter) in %s", channel.name)
             except Exception as e:
-                print(f"Error during word filter action: {e}")
+                logger.error("Error during word filter action: %s", e)
 
 
-# Set up required intents
-intents = discord.Intents.default()
-intents.members = True 
-intents.message_content = True 
-intents.moderation = True
-intents.guild_messages = True
-intents.guild_reactions = True 
+# Set up required intents (only what the handlers above consume)
+intents = discord.Intents.none()
+intents.guilds = True # Guild, channel and role cache
+intents.members = True # Member cache for reaction-role removal
+intents.guild_messages = True # on_message, on_message_delete, on_message_edit
+intents.message_content = True # Word filter and edit/delete logs
+intents.guild_reactions = True # Reaction roles
 
 bot = HyperOSBot(intents=intents)
 
 
 # --- 2. SLASH COMMANDS (Consolidated Admin Group and Reaction Role Utility) ---
 
-@bot.tree.command(name="addreactionrole", description="Adds a reaction role binding to a specific message.")
+@bot.tree.command(name="addreactionrole", description="Adds a reaction role binding to a specific message.", guild=GUILD_OBJECT)
 @app_commands.describe(message_link="Link to the reaction role message", emoji="The emoji to use", role="The role to assign")
 @app_commands.checks.has_permissions(administrator=True) 
 async def add_reaction_role(interaction: discord.Interaction, message_link: str, emoji: str, role: discord.Role):
     await interaction.response.defer(ephemeral=True)
     try:
-        parts = message_link.split('/')
-        if len(parts) < 3:
+        match = MESSAGE_LINK_RE.search(message_link)
+        if not match:
              return await interaction.followup.send("❌ Invalid message link format. Ensure it's a full Discord message link.", ephemeral=True)
              
-        message_id = parts[-1]
-        channel_id = parts[-2]
+        # Everything checkable locally is checked before the one network call
+        if not role.is_assignable():
+            return await interaction.followup.send(f"❌ I can't assign {role.name}: it is managed or not below my highest role.", ephemeral=True)
+
+        channel_id, message_id = match.groups()
         channel = bot.get_channel(int(channel_id))
-        if not channel:
+        if not channel or not hasattr(channel, 'get_partial_message'):
             return await interaction.followup.send("❌ Could not find the channel from the message link.", ephemeral=True)
             
-        message = await channel.fetch_message(int(message_id))
-        await message.add_reaction(emoji)
+        # A partial message skips the fetch; a missing message still raises NotFound from add_reaction
+        await channel.get_partial_message(int(message_id)).add_reaction(emoji)
         
-        rr_config = CONFIG_CACHE[GUILD_ID]['reaction_roles']
-        if message_id not in rr_config: rr_config[message_id] = {}
-        rr_config[message_id][emoji] = str(role.id)
+        evicted = bot.bind_reaction_role(int(message_id), emoji, role.id)
         
         await interaction.followup.send(f"✅ Reaction Role set: {emoji} -> {role.name} for message ID {message_id}.", ephemeral=False)
+        if evicted:
+            await interaction.followup.send(
+                f"⚠️ The limit of {MAX_RR_MESSAGES} reaction-role messages was reached; removed the bindings for message ID(s) "
+                f"{', '.join(map(str, evicted))}.", ephemeral=True)
     except discord.NotFound:
         await interaction.followup.send("❌ Message not found. Check the channel ID and message ID.", ephemeral=True)
     except discord.Forbidden:
         await interaction.followup.send("❌ I am missing permissions to add a reaction or assign the role.", ephemeral=True)
-    except Exception as e:
-        await interaction.followup.send(f"❌ Error setting reaction role: {e}", ephemeral=True)
 
 
+INTERACTION_ACK_SECONDS = 2 # Defer slow commands before Discord's 3s acknowledgement deadline
+
 @app_commands.guild_only()
-@app_commands.checks.has_permissions(administrator=True)
+@app_commands.default_permissions(administrator=True) # Discord hides /admin from non-admins client-side
 class AdminCommands(app_commands.Group):
     """Administrator interface for managing bot configuration and moderation actions."""
+
+    # Check decorators on a Group class are not applied to its subcommands, so the gate lives here.
+    # interaction.permissions is the resolved bitfield sent with the interaction: no role lookups.
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.permissions.administrator
     
     # Helper to get the guild member object needed for mod actions
     async def _get_member(self, interaction: discord.Interaction, member_id: str) -> discord.Member | None:
-        if not member_id.isdigit():
+        if not is_snowflake(member_id):
             await interaction.followup.send("❌ Member ID must be a numeric ID.", ephemeral=True)
             return None
         
@@ -263,25 +694,25 @@ class AdminCommands(app_commands.Group):
 
     @app_commands.command(name="set-log-channel", description="Sets the bot's logging channel ID.")
     async def set_log_channel(self, interaction: discord.Interaction, channel: discord.TextChannel):
-        CONFIG_CACHE[GUILD_ID]['log_channel_id'] = str(channel.id)
+        interaction.client.set_log_channel_id(channel.id)
         await interaction.response.send_message(f"✅ Log channel set to {channel.mention}.", ephemeral=False)
         
     @app_commands.command(name="set-word-filter", description="Sets the blacklisted words (comma separated).")
     @app_commands.describe(words="Comma separated list of words to blacklist (e.g., word1,word2).")
     async def set_word_filter(self, interaction: discord.Interaction, words: str):
         new_word_list = [w.strip().lower() for w in words.split(',') if w.strip()]
-        CONFIG_CACHE[GUILD_ID]['word_filter_list'] = new_word_list
+        interaction.client.set_word_filter_list(new_word_list)
         words_out = ", ".join(new_word_list) if new_word_list else "None"
         await interaction.response.send_message(f"✅ Word Filter List successfully updated to: `{words_out}`. Filter is now active.", ephemeral=False)
 
     @app_commands.command(name="view-status", description="Displays the current bot configuration.")
     async def view_status(self, interaction: discord.Interaction):
-        config = CONFIG_CACHE.get(GUILD_ID, {})
-        log_id = config.get('log_channel_id', 'Not Set')
-        filter_list = ", ".join(config.get('word_filter_list', [])) or "None"
-        rr_count = len(config.get('reaction_roles', {}))
+        config = CONFIG_CACHE[GUILD_ID]
+        log_id = config.log_channel_id or 'Not Set'
+        filter_list = ", ".join(config.word_filter_list) or "None"
+        rr_count = len(config.reaction_roles)
         
-        embed = discord.Embed(title="⚙️ HyperOS Bot Status", color=discord.Color.blurple())
+        embed = discord.Embed(title="⚙️ HyperOS Bot Status", color=COLOR_STATUS)
         embed.add_field(name="Log Channel ID", value=log_id, inline=False)
         embed.add_field(name="Word Filter List", value=filter_list[:1024] or "None", inline=False)
         embed.add_field(name="Reaction Roles Configured", value=rr_count, inline=True)
@@ -299,33 +730,35 @@ class AdminCommands(app_commands.Group):
             await interaction.followup.send(f"✅ Bot nickname successfully changed to `{nickname}`.", ephemeral=False)
         except discord.Forbidden:
             await interaction.followup.send("❌ I do not have permissions to change my nickname (Manage Nicknames).", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ An error occurred: {e}", ephemeral=True)
 
     @app_commands.command(name="webhook-send", description="Send a message to a channel using a webhook.")
     @app_commands.describe(channel="The channel to send the message to", message="The content of the message", username="Impersonated username (optional)", avatar_url="Impersonated avatar URL (optional)")
     async def webhook_send(self, interaction: discord.Interaction, channel: discord.TextChannel, message: str, username: str = None, avatar_url: str = None):
-        await interaction.response.defer(ephemeral=True)
         try:
-            # We will use the REST API helper for consistency with the dashboard
-            webhook_id, webhook_token = _get_or_create_webhook(channel.id)
-
+            # Same REST path as the dashboard, so a webhook deleted since it was cached is evicted and refetched
             payload = {"content": message}
-            if username: payload["username"] = username
-            if avatar_url: payload["avatar_url"] = avatar_url
-
-            requests.post(
-                f"{DISCORD_API_BASE_URL}/webhooks/{webhook_id}/{webhook_token}",
-                json=payload
-            ).raise_for_status()
-
-            await interaction.followup.send(f"✅ Message sent successfully to {channel.mention}.", ephemeral=True)
+            if username:
+                payload["username"] = username
+            if avatar_url:
+                payload["avatar_url"] = avatar_url
+            sending = asyncio.ensure_future(_send_webhook_message(channel.id, payload))
+            # Usually one cached POST; a cache miss or refetch (retries, backoff) can outlast the 3s interaction deadline
+            done, _ = await asyncio.wait({sending}, timeout=INTERACTION_ACK_SECONDS)
+            if not done:
+                await interaction.response.defer(ephemeral=True)
+            await sending
+
+            # Only confirmed once the post has gone through
+            send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+            await send(f"✅ Message sent successfully to {channel.mention}.", ephemeral=True)
 
         except Exception as e:
-            error_msg = str(e)
+            # str() of a ClientResponseError includes the URL, i.e. the webhook token
+            error_msg = f"Discord API Error ({e.status}): {e.message}" if isinstance(e, aiohttp.ClientResponseError) else str(e)
             if "Failed to create webhook" in error_msg:
                  error_msg = "Failed to send message: Bot requires 'Manage Webhooks' permission in that channel."
-            await interaction.followup.send(f"❌ Error sending webhook message: {error_msg}", ephemeral=True)
+            send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+            await send(f"❌ Error sending webhook message: {error_msg}", ephemeral=True)
 
 
     # --- MODERATION ACTIONS ---
@@ -339,41 +772,29 @@ class AdminCommands(app_commands.Group):
             await interaction.followup.send(f"✅ Successfully deleted {len(deleted_messages)} messages in {channel.mention}.", ephemeral=False)
         except discord.Forbidden:
             await interaction.followup.send("❌ I do not have permissions to manage messages in that channel.", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ An unexpected error occurred: {e}", ephemeral=True)
 
     @app_commands.command(name="timeout", description="Mutes a member using Discord's timeout feature.")
-    @app_commands.describe(member_id="The User ID of the member to mute", duration_minutes="Duration in minutes (up to 40320 / 28 days)", reason="Reason for the timeout")
-    async def timeout(self, interaction: discord.Interaction, member_id: str, duration_minutes: app_commands.Range[int, 1, 40320], reason: str = "No reason provided"):
+    @app_commands.describe(member_id="The User ID of the member to mute", duration="Duration in the chosen unit (up to 28 days)", unit="Unit of the duration (default: minutes)", reason="Reason for the timeout")
+    async def timeout(self, interaction: discord.Interaction, member_id: str, duration: app_commands.Range[int, 1, 40320], unit: TimeoutUnit = 'minutes', reason: str = "No reason provided"):
         await interaction.response.defer(ephemeral=True)
+
+        seconds = duration_to_seconds(duration, unit)
+        if seconds > MAX_TIMEOUT_SECONDS:
+            return await interaction.followup.send("❌ Timeout duration cannot exceed 28 days.", ephemeral=True)
         
         member = await self._get_member(interaction, member_id)
         if not member: return
 
-        seconds = duration_minutes * 60
-        timeout_until = time.time() + seconds
-        timeout_dt = (discord.utils.utcnow() + timedelta(minutes=duration_minutes)).isoformat()
-        
         try:
-            # Apply Discord Timeout using REST API patch (more reliable for high concurrency)
-            requests.patch(
-                f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}/members/{member_id}",
-                headers=BOT_API_HEADERS,
-                json={
-                    "communication_disabled_until": timeout_dt,
-                    "reason": reason
-                }
-            ).raise_for_status()
-
-            # Update bot's in-memory silent mute (for message deletion)
-            bot.muted_users[member.id] = timeout_until
+            # Discord blocks the member from sending messages for the whole timeout
+            await member.timeout(timedelta(seconds=seconds), reason=reason)
             
-            await interaction.followup.send(f"✅ Successfully timed out {member.mention} for {duration_minutes} minutes. Reason: `{reason}`", ephemeral=False)
+            # Discord timestamp markup renders client-side as a live relative time ("in 2 hours")
+            ends_at = f"<t:{int(time.time()) + seconds}:R>"
+            await interaction.followup.send(f"✅ Successfully timed out {member.mention} for {duration} {unit} (ends {ends_at}). Reason: `{reason}`", ephemeral=False)
 
-        except HTTPError as e:
-            return await interaction.followup.send(f"❌ Discord API Error: Could not timeout user. Status code: {e.response.status_code}", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ An unexpected error occurred: {e}", ephemeral=True)
+        except discord.Forbidden:
+            await interaction.followup.send("❌ I do not have permissions to timeout this user, or their role is higher than mine.", ephemeral=True)
     
     @app_commands.command(name="untimeout", description="Removes timeout (unmutes) a member.")
     @app_commands.describe(member_id="The User ID of the member to unmute")
@@ -385,25 +806,12 @@ class AdminCommands(app_commands.Group):
 
         try:
             # Remove Discord Timeout
-            requests.patch(
-                f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}/members/{member_id}",
-                headers=BOT_API_HEADERS,
-                json={
-                    "communication_disabled_until": None,
-                    "reason": "Unmuted via /admin untimeout."
-                }
-            ).raise_for_status()
-
-            # Remove from bot's in-memory silent mute
-            if member.id in bot.muted_users:
-                del bot.muted_users[member.id]
+            await member.timeout(None, reason="Unmuted via /admin untimeout.")
             
             await interaction.followup.send(f"✅ Successfully removed timeout for {member.mention}.", ephemeral=False)
 
-        except HTTPError as e:
-            return await interaction.followup.send(f"❌ Discord API Error: Could not remove timeout. Status code: {e.response.status_code}", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ An unexpected error occurred: {e}", ephemeral=True)
+        except discord.Forbidden:
+            await interaction.followup.send("❌ I do not have permissions to remove this user's timeout.", ephemeral=True)
 
     @app_commands.command(name="kick", description="Kicks a member from the server.")
     @app_commands.describe(member_id="The User ID of the member to kick", reason="Reason for the kick")
@@ -418,144 +826,357 @@ class AdminCommands(app_commands.Group):
             await interaction.followup.send(f"✅ Successfully kicked {member.name} (ID: {member_id}). Reason: `{reason}`", ephemeral=False)
         except discord.Forbidden:
             await interaction.followup.send("❌ I do not have permissions to kick this user, or their role is higher than mine.", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ An unexpected error occurred: {e}", ephemeral=True)
 
     @app_commands.command(name="ban", description="Bans a user from the server (removes 1 day of messages).")
     @app_commands.describe(user_id="The User ID of the member to ban", reason="Reason for the ban")
     async def ban(self, interaction: discord.Interaction, user_id: str, reason: str = "No reason provided"):
         await interaction.response.defer(ephemeral=True)
         
-        if not user_id.isdigit():
+        if not is_snowflake(user_id):
             return await interaction.followup.send("❌ User ID must be a numeric ID.", ephemeral=True)
 
         try:
             await interaction.guild.ban(discord.Object(id=int(user_id)), reason=reason, delete_message_days=1)
+            bot.cancel_unban(int(user_id)) # A permanent ban overrides any pending temporary one
             await interaction.followup.send(f"✅ Successfully banned user ID {user_id}. Reason: `{reason}`", ephemeral=False)
         except discord.Forbidden:
             await interaction.followup.send("❌ I do not have permissions to ban users.", ephemeral=True)
         except discord.NotFound:
             await interaction.followup.send("❌ User ID not found in Discord.", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ An unexpected error occurred: {e}", ephemeral=True)
 
     @app_commands.command(name="unban", description="Unbans a user using their User ID.")
     @app_commands.describe(user_id="The User ID of the member to unban")
     async def unban(self, interaction: discord.Interaction, user_id: str):
         await interaction.response.defer(ephemeral=True)
 
-        if not user_id.isdigit():
+        if not is_snowflake(user_id):
             return await interaction.followup.send("❌ User ID must be a numeric ID.", ephemeral=True)
 
         try:
             # Fetch the Banned Entry (required for unban)
             banned_user = discord.Object(id=int(user_id))
             await interaction.guild.unban(banned_user, reason=f"Unbanned by {interaction.user.name} via /admin unban")
+            bot.cancel_unban(banned_user.id)
             await interaction.followup.send(f"✅ Successfully unbanned user ID {user_id}.", ephemeral=False)
         except discord.Forbidden:
             await interaction.followup.send("❌ I do not have permissions to unban users.", ephemeral=True)
         except discord.NotFound:
             await interaction.followup.send("❌ User ID was not found in the ban list.", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ An unexpected error occurred: {e}", ephemeral=True)
 
 # Add the admin group to the command tree
-bot.tree.add_command(AdminCommands(name="admin"))
+bot.tree.add_command(AdminCommands(name="admin"), guild=GUILD_OBJECT)
 
-# --- 3. FLASK WEB SERVER & DASHBOARD ---
-
-app = Flask(__name__)
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    """Single reply path for failed checks and any error a command does not handle itself."""
+    if isinstance(error, app_commands.CheckFailure):
+        message = "❌ You need Administrator permissions to use this command."
+    else:
+        original = getattr(error, 'original', error) # Unwrap CommandInvokeError
+        if isinstance(original, discord.HTTPException):
+            message = f"❌ Discord API Error ({original.status}): {original.text or 'Request failed.'}"
+        else:
+            message = f"❌ An unexpected error occurred: {original}"
+        logger.error("Error in command %s: %r", interaction.command.name if interaction.command else 'unknown', original)
+
+    send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+    await send(message, ephemeral=True)
+
+# --- 3. QUART WEB SERVER & DASHBOARD ---
+
+class PlainJSONSessionSerializer:
+    """Session payload codec without Quart's type tagging; the session only holds strings and bools."""
+    def dumps(self, value):
+        return json_dumps(value)
+    def loads(self, value):
+        return json_loads(value)
+
+class CompactSessionInterface(SecureCookieSessionInterface):
+    """Signed-cookie sessions encoded as minimal JSON (untagged plain JSON cookies decode either way)."""
+    serializer = PlainJSONSessionSerializer()
+
+    async def open_session(self, app, request):
+        # Quart opens the session for every request; the liveness probe skips the cookie decode
+        if request.path == '/healthz':
+            return await self.make_null_session(app)
+        return await super().open_session(app, request)
+
+app = Quart(__name__)
+# Compiled templates persist across restarts in a per-user temp dir; must be set before jinja_env is first used.
+# Quart compiles templates for async rendering, so its cache files must not share names with sync-compiled ones.
+app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(pattern='__hyperos_async_%s.cache')}
+app.session_interface = CompactSessionInterface()
+# Largest dashboard form is a 2000-char message; URL-encoded multibyte text stays well under this
+MAX_FORM_BYTES = 64 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_FORM_BYTES
 # The dashboard needs the BOT_TOKEN to make direct REST API calls
 BOT_API_HEADERS = {'Authorization': f'Bot {BOT_TOKEN}', 'Content-Type': 'application/json'}
 
+@lru_cache(maxsize=None)
+def endpoint_url(endpoint):
+    """url_for() for argument-free endpoints, resolved once; the app is always mounted at the same root."""
+    return url_for(endpoint)
+
+app.jinja_env.globals['endpoint_url'] = endpoint_url
+
+def channel_options(channels, selected=None):
+    """Joins the prebuilt <option> tags for a channel dropdown, marking the `selected` channel ID."""
+    return Markup("".join(
+        # str() first: Markup.replace would escape the inserted attribute
+        str(c['option']).replace('">', '" selected>', 1) if c['id'] == selected else c['option']
+        for c in channels
+    ))
+
+app.jinja_env.globals['channel_options'] = channel_options
+
+# Session user IDs allowed into the dashboard; both login paths store the ID as a string
+ADMIN_SESSION_IDS = frozenset({'FALLBACK_ADMIN', DASHBOARD_ADMIN_USER_ID})
+
 def login_required(f):
-    """Decorator to ensure user is authenticated via OAuth or passphrase."""
+    """Decorator to ensure user is authenticated via OAuth or passphrase.
+
+    The session holds only the user ID (a login is implied by its presence), read once into g.user_id."""
     @wraps(f)
-    def decorated_function(*args, **kwargs):
-        is_authenticated = session.get('authenticated', False)
+    async def decorated_function(*args, **kwargs):
         user_id = session.get('discord_user_id')
-
-        is_fallback_admin = is_authenticated and user_id == 'FALLBACK_ADMIN'
-        is_oauth_admin = is_authenticated and str(user_id) == DASHBOARD_ADMIN_USER_ID
-        
-        if not (is_fallback_admin or is_oauth_admin):
+        if user_id not in ADMIN_SESSION_IDS:
             return redirect(url_for('login', next=request.url))
-        return f(*args, **kwargs)
+        g.user_id = user_id
+        return await f(*args, **kwargs)
     return decorated_function
 
-# --- HELPER FUNCTIONS FOR FLASK (Discord API) ---
-
-def _get_guild_channels():
-    """Fetches text channels for the guild via REST API for dashboard dropdowns."""
+# Fixed-window admission control per client IP; handlers all run on the bot loop, so no lock is needed
+_rate_windows = defaultdict(deque) # {(endpoint, ip): deque[monotonic timestamps]}
+
+def rate_limited(limit=10, window=60):
+    """Decorator answering 429 once a client IP has made `limit` calls to the view within `window` seconds."""
+    def decorator(f):
+        @wraps(f)
+        async def decorated_function(*args, **kwargs):
+            now = time.monotonic()
+            if len(_rate_windows) > 1024: # Forget clients whose windows have fully expired
+                for key in [k for k, q in _rate_windows.items() if now - q[-1] > window]:
+                    del _rate_windows[key]
+            hits = _rate_windows[(f.__name__, request.remote_addr)]
+            while hits and now - hits[0] > window:
+                hits.popleft()
+            if len(hits) >= limit:
+                retry_after = int(window - (now - hits[0])) + 1
+                return "Too many requests, try again shortly.", 429, {'Retry-After': str(retry_after)}
+            hits.append(now)
+            return await f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+# --- HELPER FUNCTIONS FOR THE DASHBOARD (Discord API) ---
+
+API_MAX_ATTEMPTS = 3
+API_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A 5xx can arrive after Discord already acted: only idempotent methods are resent for one, POSTs only on 429
+API_IDEMPOTENT_METHODS = {'GET', 'PUT', 'PATCH', 'DELETE'}
+# Discord buckets limits per route and top-level resource, so IDs only collapse after the major parameter
+API_ROUTE_ID_RE = re.compile(r'(?<!channels/)(?<!guilds/)(?<!webhooks/)\b\d{17,20}\b')
+API_MAJOR_ID_RE = re.compile(r'(?:channels|guilds|webhooks)/(\d+)')
+# Rate-limit state from X-RateLimit-* headers; bot loop only. Routes Discord reports under the same
+# X-RateLimit-Bucket hash (for the same major IDs) share one entry, so they draw from one budget.
+_route_buckets = {} # {"METHOD path": "bucket_hash:major_ids"}
+_route_limits = {} # {bucket key (or route until its hash is known): [remaining, reset_at (monotonic)]}
+_global_reset_at = 0.0 # Monotonic time a global 429 clears; every request waits for it
+
+async def _wait_for_route(route):
+    """Takes a request from the route's last known bucket, sleeping until its reset if it is spent."""
+    if (delay := _global_reset_at - time.monotonic()) > 0:
+        await asyncio.sleep(delay)
+    bucket = _route_buckets.get(route, route)
+    limit = _route_limits.get(bucket)
+    if limit is None:
+        return
+    now = time.monotonic()
+    if now >= limit[1]:
+        del _route_limits[bucket] # Bucket has refilled; the next response reports it afresh
+    elif limit[0] > 0:
+        limit[0] -= 1 # No await since the lookup, so concurrent callers can't overdraw it
+    else:
+        await asyncio.sleep(limit[1] - now)
+
+def _update_route(route, url, response):
+    """Records the bucket state a Discord response reported for its route."""
+    global _global_reset_at
+    headers = response.headers
+    if response.status == 429 and headers.get('X-RateLimit-Global'):
+        _global_reset_at = time.monotonic() + float(headers.get('Retry-After', 1))
+        return
+    remaining, reset_after = headers.get('X-RateLimit-Remaining'), headers.get('X-RateLimit-Reset-After')
+    if remaining is None or reset_after is None:
+        return
+    bucket = route
+    if bucket_hash := headers.get('X-RateLimit-Bucket'):
+        bucket = _route_buckets[route] = f"{bucket_hash}:{'/'.join(API_MAJOR_ID_RE.findall(url))}"
+    _route_limits[bucket] = [int(remaining), time.monotonic() + float(reset_after)]
+
+async def _discord_request(method, url, **kwargs):
+    """Sends a Discord REST request on the shared session and returns the JSON body (None for 204).
+
+    Requests wait for a spent rate-limit bucket (or a global limit) to reset instead of drawing a 429. 429s that
+    still happen wait out Discord's retry_after and 5xx responses to idempotent methods back off exponentially,
+    both with jitter and capped at 5s, for up to API_MAX_ATTEMPTS tries before the error is raised.
+    A POST is never resent after a 5xx, as it may already have posted the message or created the webhook.
+    Errors raise aiohttp.ClientResponseError with Discord's response body as the message."""
+    route = f"{method} {API_ROUTE_ID_RE.sub('{id}', url.partition('?')[0])}"
+    retry_statuses = API_RETRY_STATUSES if method in API_IDEMPOTENT_METHODS else {429}
+    for attempt in range(API_MAX_ATTEMPTS):
+        await _wait_for_route(route)
+        async with bot.api_session.request(method, url, **kwargs) as response:
+            _update_route(route, url, response)
+            if response.status not in retry_statuses or attempt == API_MAX_ATTEMPTS - 1:
+                if response.status >= 400:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status,
+                                                      message=await response.text(), headers=response.headers)
+                if response.status == 204:
+                    return None
+                return await response.json(loads=json_loads)
+            if response.status == 429:
+                try:
+                    delay = float((await response.json(loads=json_loads)).get('retry_after', 1))
+                except Exception:
+                    delay = float(response.headers.get('Retry-After', 1))
+            else:
+                delay = 0.5 * 2 ** attempt
+        await asyncio.sleep(min(delay + random.uniform(0, 0.25), 5.0))
+
+_inflight = {} # {key: asyncio.Task} for dashboard writes still waiting on Discord; bot loop only
+
+async def _coalesced(key, make_coro):
+    """Runs make_coro() once per key at a time: identical calls made while it is in flight await the same result.
+
+    Double-clicked buttons and two admins submitting the same action cost one Discord call instead of two.
+    The shared task is shielded so one caller disconnecting doesn't cancel it for the others."""
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = asyncio.create_task(make_coro())
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+async def bot_api(method, url, **kwargs):
+    """Sends a bot-authenticated Discord REST call on the shared session; identical in-flight writes are coalesced."""
+    if method == 'GET':
+        return await _discord_request(method, url, headers=BOT_API_HEADERS, **kwargs)
+    return await _coalesced((method, url, json_dumps(kwargs)),
+                            lambda: _discord_request(method, url, headers=BOT_API_HEADERS, **kwargs))
+
+async def _discord_token_exchange(code):
+    """Exchanges an OAuth authorization code for an access token."""
+    return await _discord_request('POST', DISCORD_TOKEN_URL, data={**OAUTH_TOKEN_FORM, 'code': code}, headers=OAUTH_TOKEN_HEADERS)
+
+async def _discord_get_user(access_token):
+    """Fetches the Discord user that owns an OAuth access token."""
+    return await _discord_request('GET', DISCORD_USER_URL, headers={'Authorization': f"Bearer {access_token}"})
+
+async def _discord_oauth_identify(code):
+    """Exchanges an OAuth code and returns the Discord user it belongs to (the lookup needs the token)."""
+    token_info = await _discord_token_exchange(code)
+    return await _discord_get_user(token_info['access_token'])
+
+CHANNEL_CACHE_TTL = 60 # Seconds; channel create/update/delete events also invalidate it
+_channel_cache = {'data': None, 'expires_at': 0.0} # Only touched on the bot loop
+
+def invalidate_channel_cache():
+    """Forces the next dashboard load to refetch the channel list."""
+    _channel_cache['expires_at'] = 0.0
+
+async def _get_guild_channels():
+    """Fetches text channels for the guild via REST API for dashboard dropdowns (cached; treat as read-only)."""
+    if _channel_cache['data'] is not None and time.monotonic() < _channel_cache['expires_at']:
+        return _channel_cache['data']
     try:
-        response = requests.get(
-            f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}/channels",
-            headers=BOT_API_HEADERS
-        )
-        response.raise_for_status()
-        channels = response.json()
+        channels = await _discord_request('GET', f"{DISCORD_GUILD_URL}/channels", headers=BOT_API_HEADERS)
         
         # Filter for text channels (type 0) and sort by position
         text_channels = sorted(
             [c for c in channels if c.get('type') == 0], 
             key=lambda x: x.get('position', 999)
         )
-        return [{"id": c['id'], "name": c['name']} for c in text_channels]
-    except HTTPError as e:
-        print(f"Error fetching channels: {e.response.status_code} - {e.response.text}")
+        # The <option> markup is built here once per fetch; the dashboard reuses it on every render
+        _channel_cache['data'] = [{
+            "id": c['id'],
+            "name": c['name'],
+            "option": Markup('<option value="{0}">#{1} ({0})</option>').format(c['id'], c['name'])
+        } for c in text_channels]
+        _channel_cache['expires_at'] = time.monotonic() + CHANNEL_CACHE_TTL
+        return _channel_cache['data']
+    except aiohttp.ClientResponseError as e:
+        logger.error("Error fetching channels: %s - %s", e.status, e.message)
         return []
     except Exception as e:
-        print(f"Unexpected error fetching channels: {e}")
+        logger.error("Unexpected error fetching channels: %s", e)
         return []
 
-def _get_or_create_webhook(channel_id):
-    """Gets the first available webhook or creates a new one for a channel."""
+WEBHOOK_CACHE_SIZE = 128
+_webhook_cache = {} # {channel_id (str): (webhook_id, webhook_token)}, oldest first; only touched on the bot loop
+
+async def _get_or_create_webhook(channel_id):
+    """Gets the first available webhook or creates a new one for a channel (cached; tokens don't expire)."""
     channel_id = str(channel_id)
+    cached = _webhook_cache.get(channel_id)
+    if cached:
+        return cached
+
+    async def fetch():
+        webhook = await _find_or_create_webhook(channel_id)
+        if len(_webhook_cache) >= WEBHOOK_CACHE_SIZE:
+            del _webhook_cache[next(iter(_webhook_cache))]
+        _webhook_cache[channel_id] = webhook
+        return webhook
+    # Concurrent misses share one lookup, so they can't each create a webhook against Discord's per-channel cap
+    return await _coalesced(('webhook', channel_id), fetch)
+
+async def _find_or_create_webhook(channel_id):
+    """Looks up the channel's 'HyperOS Impersonator' webhook via REST, creating it if missing."""
     # 1. Try to find an existing webhook named 'HyperOS Impersonator'
     try:
-        response = requests.get(
-            f"{DISCORD_API_BASE_URL}/channels/{channel_id}/webhooks",
-            headers=BOT_API_HEADERS
-        )
-        response.raise_for_status()
-        webhooks = response.json()
+        webhooks = await _discord_request('GET', f"{DISCORD_CHANNELS_URL}/{channel_id}/webhooks", headers=BOT_API_HEADERS)
         
         existing_webhook = next((w for w in webhooks if w['name'] == 'HyperOS Impersonator'), None)
         if existing_webhook:
             return existing_webhook['id'], existing_webhook['token']
     
-    except HTTPError as e:
-        print(f"Error checking webhooks: {e.response.text}")
+    except aiohttp.ClientResponseError as e:
+        logger.error("Error checking webhooks: %s", e.message)
         # Continue to creation if permission error or not found
     except Exception as e:
-        print(f"Unexpected error during webhook check: {e}")
+        logger.error("Unexpected error during webhook check: %s", e)
 
     # 2. If not found, create a new one
     try:
-        creation_response = requests.post(
-            f"{DISCORD_API_BASE_URL}/channels/{channel_id}/webhooks",
+        new_webhook = await _discord_request(
+            'POST',
+            f"{DISCORD_CHANNELS_URL}/{channel_id}/webhooks",
             headers=BOT_API_HEADERS,
             json={"name": "HyperOS Impersonator"}
         )
-        creation_response.raise_for_status()
-        new_webhook = creation_response.json()
         return new_webhook['id'], new_webhook['token']
     
-    except HTTPError as e:
-        print(f"Error creating webhook: {e.response.text}")
-        raise Exception(f"Failed to create webhook (Check BOT permissions). API Error: {e.response.status_code}")
+    except aiohttp.ClientResponseError as e:
+        logger.error("Error creating webhook: %s", e.message)
+        raise Exception(f"Failed to create webhook (Check BOT permissions). API Error: {e.status}")
     except Exception as e:
         raise Exception(f"Unexpected error during webhook creation: {e}")
 
-def _get_recent_messages(channel_id, limit=10):
+async def _send_webhook_message(channel_id, payload):
+    """Executes the channel's impersonation webhook, refetching it once if the cached one was deleted."""
+    for attempt in range(2):
+        webhook_id, webhook_token = await _get_or_create_webhook(channel_id)
+        try:
+            return await _discord_request('POST', f"{DISCORD_WEBHOOKS_URL}/{webhook_id}/{webhook_token}", json=payload)
+        except aiohttp.ClientResponseError as e:
+            if e.status not in (401, 404) or attempt:
+                raise
+            _webhook_cache.pop(str(channel_id), None)
+
+async def _get_recent_messages(channel_id, limit=10):
     """Fetches recent messages from a channel via REST API for conversational context."""
     try:
-        response = requests.get(
-            f"{DISCORD_API_BASE_URL}/channels/{channel_id}/messages?limit={limit}",
-            headers=BOT_API_HEADERS
-        )
-        response.raise_for_status()
-        messages = response.json()
+        messages = await _discord_request('GET', f"{DISCORD_CHANNELS_URL}/{channel_id}/messages?limit={limit}", headers=BOT_API_HEADERS)
         
         # Simplify data for display, reversing order so oldest is first (more natural reading flow)
         simplified_messages = [{
@@ -564,401 +1185,181 @@ def _get_recent_messages(channel_id, limit=10):
             "timestamp": msg['timestamp']
         } for msg in messages]
         return simplified_messages[::-1]
-    except HTTPError as e:
-        print(f"Error fetching messages for context: {e.response.status_code} - {e.response.text}")
+    except aiohttp.ClientResponseError as e:
+        logger.error("Error fetching messages for context: %s - %s", e.status, e.message)
         return None
     except Exception as e:
-        print(f"Unexpected error fetching messages: {e}")
+        logger.error("Unexpected error fetching messages: %s", e)
         return None
 
-
-# --- TEMPLATES (Login omitted for brevity, it is unchanged) ---
-
-DASHBOARD_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>HyperOS Bot Dashboard</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-        body { font-family: 'Inter', sans-serif; }
-        .grid-card { @apply bg-gray-800 p-6 rounded-xl shadow-2xl border border-gray-700 h-full; }
-        .form-heading { @apply text-xl font-semibold mb-4 border-b border-gray-700 pb-2 text-indigo-300; }
-        .input-style { @apply w-full px-4 py-2 bg-gray-700 border border-gray-600 rounded-lg text-white focus:ring-indigo-500 focus:border-indigo-500 transition duration-150; }
-        .btn-primary { @apply w-full bg-indigo-600 hover:bg-indigo-700 text-white font-bold py-2 px-4 rounded-lg transition duration-300 shadow-md hover:shadow-lg mt-4; }
-        .btn-danger { @apply w-full bg-red-600 hover:bg-red-700 text-white font-bold py-2 px-4 rounded-lg transition duration-300 shadow-md hover:shadow-lg mt-4; }
-        .message-context { @apply p-3 bg-gray-900 border border-gray-700 rounded-lg max-h-48 overflow-y-auto mb-4; }
-        .message-item { @apply border-b border-gray-800 py-1 last:border-b-0 text-sm; }
-        .message-author { @apply font-semibold text-indigo-400; }
-        .message-content { @apply text-gray-300 break-words; }
-    </style>
-</head>
-<body class="bg-gray-900 text-white min-h-screen p-8">
-    <div class="max-w-6xl mx-auto">
-        <div class="flex justify-between items-center mb-6 border-b border-gray-700 pb-4">
-            <h1 class="text-4xl font-bold text-indigo-400">HyperOS Bot Dashboard</h1>
-            <a href="{{ url_for('logout') }}" class="text-sm text-red-400 hover:text-red-500 transition duration-150 p-2 border border-red-400 rounded-lg">Log Out</a>
-        </div>
-        
-        {% if status %}
-        <div class="bg-green-900/50 border border-green-700 text-white p-4 rounded-lg mb-6">
-            <p class="font-semibold">Status: <span class="text-green-300">{{ status }}</span></p>
-        </div>
-        {% elif error %}
-        <div class="bg-red-900/50 border border-red-700 text-white p-4 rounded-lg mb-6">
-            <p class="font-semibold">Error: <span class="text-red-300">{{ error }}</span></p>
-        </div>
-        {% endif %}
-
-        <div class="mb-8 text-sm text-gray-400">
-            <p>Logged in as: <span class="font-mono text-indigo-300">{{ user_id }}</span> | Guild ID: <span class="font-mono text-indigo-300">{{ guild_id }}</span></p>
-            <p class="mt-1">Use the comprehensive Discord command <span class="font-mono text-indigo-300">/admin</span> if the dashboard is inaccessible.</p>
-        </div>
-
-        <!-- Moderation Actions Grid -->
-        <div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6 mb-6">
-
-            <!-- 1. PRUNE MESSAGES -->
-            <div class="grid-card">
-                <h2 class="form-heading">🧹 Prune Messages</h2>
-                <p class="text-gray-400 text-sm mb-4">Delete a bulk amount of recent messages in a channel.</p>
-                <form method="POST" action="{{ url_for('api_prune') }}">
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Target Channel</label>
-                    <select name="channel_id" required class="input-style mb-4">
-                        {% for channel in channels %}
-                        <option value="{{ channel.id }}">#{{ channel.name }} ({{ channel.id }})</option>
-                        {% endfor %}
-                    </select>
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Count (Max 100)</label>
-                    <input type="number" name="count" min="1" max="100" value="10" required class="input-style mb-4">
-                    <button type="submit" class="btn-danger">Execute Prune</button>
-                </form>
-            </div>
-
-            <!-- 2. TEMPORARY MUTE -->
-            <div class="grid-card">
-                <h2 class="form-heading">🔇 Temporary Mute (Timeout)</h2>
-                <p class="text-gray-400 text-sm mb-4">Uses Discord's built-in Timeout feature.</p>
-                <form method="POST" action="{{ url_for('api_tempmute') }}">
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Member ID</label>
-                    <input type="text" name="member_id" placeholder="User ID (e.g., 8765...)" required class="input-style mb-4">
-                    
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Duration</label>
-                    <div class="flex space-x-2">
-                        <input type="number" name="duration" min="1" value="30" required class="input-style w-1/2">
-                        <select name="unit" required class="input-style w-1/2">
-                            <option value="minutes">Minutes</option>
-                            <option value="hours">Hours</option>
-                            <option value="days">Days (Max 28)</option>
-                        </select>
-                    </div>
-                    
-                    <label class="block text-sm font-medium text-gray-300 mb-2 mt-4">Reason</label>
-                    <input type="text" name="reason" placeholder="Violation of rules" class="input-style">
-                    <button type="submit" class="btn-danger">Execute Mute</button>
-                </form>
-            </div>
-
-            <!-- 3. KICK / BAN / UNBAN -->
-            <div class="grid-card">
-                <h2 class="form-heading">🔨 Kick / Ban Actions</h2>
-                <p class="text-gray-400 text-sm mb-4">Hard moderation actions.</p>
-                <form method="POST" action="{{ url_for('api_kick_ban') }}">
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Member ID</label>
-                    <input type="text" name="member_id" placeholder="User ID" required class="input-style mb-4">
-                    
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Action</label>
-                    <select name="action_type" required class="input-style mb-4">
-                        <option value="kick">Kick User</option>
-                        <option value="tempban">Temporary Ban (1 Day of messages deleted)</option>
-                        <option value="unban">Unban User</option>
-                    </select>
-
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Reason</label>
-                    <input type="text" name="reason" placeholder="Reason for action" class="input-style">
-                    <button type="submit" class="btn-danger">Execute Action</button>
-                </form>
-            </div>
-            
-            <!-- 4. SEND MESSAGE (IMPERSONATION) -->
-            <div class="grid-card">
-                <h2 class="form-heading">🗣️ Send Message (Webhook Impersonation)</h2>
-                <p class="text-gray-400 text-sm mb-2">Send a message that appears to be from a custom user/avatar. (Message Context below)</p>
-                
-                <!-- CONTEXT SELECTION FORM -->
-                <form method="GET" action="{{ url_for('dashboard') }}" id="context-form" class="mb-4">
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Channel for Context & Message</label>
-                    <select name="context_channel_id" onchange="document.getElementById('context-form').submit()" class="input-style">
-                        {% for channel in channels %}
-                        <option value="{{ channel.id }}" {% if channel.id == context_channel_id %}selected{% endif %}>#{{ channel.name }} ({{ channel.id }})</option>
-                        {% endfor %}
-                    </select>
-                </form>
-
-                <!-- MESSAGE CONTEXT PANEL -->
-                <div class="message-context">
-                    <h3 class="text-sm font-bold text-gray-400 mb-2">Recent Messages in #{{ channels | selectattr('id', 'equalto', context_channel_id) | first | default({'name': 'Loading'}) | attr('name') }}</h3>
-                    {% if recent_messages %}
-                        {% for message in recent_messages %}
-                            <div class="message-item">
-                                <span class="message-author">{{ message.author }}:</span> 
-                                <span class="message-content">{{ message.content }}</span>
-                            </div>
-                        {% endfor %}
-                    {% else %}
-                        <p class="text-gray-500 text-xs">Could not load messages. Check bot's read permissions.</p>
-                    {% endif %}
-                </div>
-                
-                <!-- WEBHOOK SEND FORM -->
-                <form method="POST" action="{{ url_for('api_send_message') }}">
-                    <input type="hidden" name="channel_id" value="{{ context_channel_id }}">
-                    
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Impersonated Username (Optional)</label>
-                    <input type="text" name="username" placeholder="Leave blank for bot's name" class="input-style mb-4">
-
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Avatar URL (Optional)</label>
-                    <input type="url" name="avatar_url" placeholder="Direct link to a profile image" class="input-style mb-4">
-                    
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Message Content</label>
-                    <textarea name="message" rows="3" placeholder="Type your message here..." required class="input-style"></textarea>
-                    
-                    <button type="submit" class="btn-primary">Send Impersonated Message</button>
-                </form>
-            </div>
-
-            <!-- 5. BOT NICKNAME CHANGE -->
-            <div class="grid-card">
-                <h2 class="form-heading">👤 Change Bot Nickname</h2>
-                <p class="text-gray-400 text-sm mb-4">Update the bot's display name in the server.</p>
-                <form method="POST" action="{{ url_for('api_change_nickname') }}">
-                    <label class="block text-sm font-medium text-gray-300 mb-2">New Nickname</label>
-                    <input type="text" name="nickname" placeholder="e.g., HyperOS Mod | ⚙️" required class="input-style mb-4">
-                    <button type="submit" class="btn-primary">Set Nickname</button>
-                </form>
-            </div>
-            
-             <!-- 6. UTILITY / UNMUTE -->
-            <div class="grid-card">
-                <h2 class="form-heading">ℹ️ Utility & Manual Unmute</h2>
-                <p class="text-gray-400 text-sm mb-4">Quick actions and current status.</p>
-                
-                <div class="mb-4">
-                    <h3 class="text-lg font-medium text-gray-300">Reaction Roles Status</h3>
-                    <p class="text-gray-400 text-sm">Messages Configured: <span class="font-bold text-indigo-300">{{ rr_count }}</span></p>
-                    <p class="text-xs text-gray-500 mt-1">Note: Use Discord command `/addreactionrole` to set up new bindings.</p>
-                </div>
-                
-                <form method="POST" action="{{ url_for('api_unmute') }}">
-                    <h3 class="text-lg font-medium text-gray-300 mt-4">Manual Unmute</h3>
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Member ID</label>
-                    <input type="text" name="member_id" placeholder="User ID" required class="input-style">
-                    <button type="submit" class="btn-primary">Execute Unmute</button>
-                </form>
-            </div>
-        </div>
-
-        <!-- CONFIGURATION GRID -->
-        <div class="grid grid-cols-1 lg:grid-cols-2 gap-6">
-            <!-- 7. CONFIGURATION: Log Channel & Word Filter -->
-            <div class="grid-card lg:col-span-1">
-                <h2 class="form-heading">⚙️ Bot Configuration (In-Memory)</h2>
-                <p class="mb-4 text-gray-400 text-sm">All settings reset on bot restart.</p>
-                
-                <form method="POST" action="{{ url_for('api_update_config') }}">
-                    <label class="block text-sm font-medium text-gray-300 mb-2">Log Channel</label>
-                    <select name="log_channel_id" class="input-style mb-4">
-                        <option value="">-- Select Log Channel --</option>
-                        {% for channel in channels %}
-                        <option value="{{ channel.id }}" {% if channel.id == current_log_id %}selected{% endif %}>#{{ channel.name }} ({{ channel.id }})</option>
-                        {% endfor %}
-                    </select>
-                    <p class="mt-2 text-xs text-gray-500">Current Log ID: <span class="font-mono text-indigo-300">{{ current_log_id or 'Not Set' }}</span></p>
-                    
-                    <label class="block text-sm font-medium text-gray-300 mb-2 mt-6">Word Filter List (Comma Separated)</label>
-                    <textarea name="word_filter_list" rows="3" class="input-style mb-4"
-                              placeholder="word1, word2, word3">{{ current_word_filter | join(', ') }}</textarea>
-
-                    <button type="submit" class="btn-primary">Update Configuration</button>
-                </form>
-            </div>
-        </div>
-        
-        <footer class="mt-10 text-center text-sm text-gray-500 border-t border-gray-800 pt-6">
-            HyperOS Discord Bot Dashboard
-        </footer>
-    </div>
-</body>
-</html>
-"""
-
-# --- FLASK ROUTES (Login and OAuth omitted, they are unchanged) ---
+# The bot's gateway cache (members intent, chunked at startup) answers "is this ID in the guild?" with no
+# REST call; before the guild is cached or chunked every ID passes through and Discord decides.
+def _known_member(member_id):
+    guild = bot.hyperos_guild
+    return guild is None or not guild.chunked or guild.get_member(int(member_id)) is not None
+
+def _known_channel(channel_id):
+    guild = bot.hyperos_guild
+    return guild is None or guild.get_channel_or_thread(int(channel_id)) is not None
+
+async def _timeout_members(member_ids, seconds, reason):
+    """Times several members out for `seconds` concurrently; returns {member_id: exception} for those that failed.
+
+    Each PATCH is coalesced on (member, duration, reason) rather than its body: the body's expiry timestamp
+    differs on every submit, which would keep a double-clicked mute from ever sharing the in-flight call."""
+    until = (discord.utils.utcnow() + timedelta(seconds=seconds)).isoformat()
+    def timeout(member_id):
+        return lambda: _discord_request(
+            'PATCH',
+            f"{DISCORD_MEMBERS_URL}/{member_id}",
+            headers=BOT_API_HEADERS,
+            json={"communication_disabled_until": until, "reason": reason}
+        )
+    results = await asyncio.gather(*(
+        _coalesced(('mute', member_id, seconds, reason), timeout(member_id)) for member_id in member_ids
+    ), return_exceptions=True)
+    return {member_id: result for member_id, result in zip(member_ids, results) if isinstance(result, Exception)}
+
+async def _prune_messages(channel_id, count):
+    """Deletes a channel's newest `count` messages and returns how many were removed."""
+    channel_url = f"{DISCORD_CHANNELS_URL}/{channel_id}/messages"
+    messages = await _discord_request('GET', channel_url, headers=BOT_API_HEADERS, params={'limit': count})
+    message_ids = [msg['id'] for msg in messages]
+    if len(message_ids) == 1:
+        # bulk-delete rejects fewer than 2 IDs
+        await _discord_request('DELETE', f"{channel_url}/{message_ids[0]}", headers=BOT_API_HEADERS)
+    elif message_ids:
+        await _discord_request('POST', f"{channel_url}/bulk-delete", headers=BOT_API_HEADERS, json={"messages": message_ids})
+    return len(message_ids)
+
+
+# --- QUART ROUTES ---
 
 @app.route('/login', methods=['GET', 'POST'])
-def login():
+async def login():
     """Handles both OAuth and passphrase login methods."""
     error = request.args.get('error_msg')
     
     # Handle Passphrase Login (POST request)
     if request.method == 'POST':
-        passphrase = request.form.get('passphrase')
-        if passphrase == FALLBACK_PASSPHRASE:
-            session['authenticated'] = True
+        passphrase = (await request.form).get('passphrase')
+        # Constant-time compare: the passphrase is the one real secret on this form
+        if passphrase and hmac.compare_digest(hashlib.blake2b(passphrase.encode(), digest_size=16).digest(), FALLBACK_HASH):
             session['discord_user_id'] = 'FALLBACK_ADMIN' # Distinct ID for fallback
             return redirect(url_for('dashboard', status="Successfully logged in with passphrase."))
         else:
             error = "Invalid passphrase."
 
-    # OAuth URL setup (for GET request or failed POST)
-    oauth_url = (
-        f"https://discord.com/oauth2/authorize?client_id={DISCORD_CLIENT_ID}"
-        f"&redirect_uri={REDIRECT_URI}"
-        f"&response_type=code"
-        f"&scope=identify" 
-    )
-    
-    return render_template_string(
-        """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Bot Login</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-        body { font-family: 'Inter', sans-serif; }
-    </style>
-</head>
-<body class="bg-gray-900 text-white min-h-screen flex items-center justify-center p-4">
-    <div class="w-full max-w-md bg-gray-800 p-8 rounded-xl shadow-2xl border border-indigo-700">
-        <h1 class="text-3xl font-bold mb-6 text-center text-indigo-400">HyperOS Dashboard Login</h1>
-        
-        {% if error %}
-        <div class="bg-red-900 border border-red-700 text-white p-3 rounded-lg mb-4 text-sm">
-            {{ error }}
-        </div>
-        {% endif %}
-
-        <!-- Discord OAuth Section -->
-        <p class="text-gray-400 mb-4 text-center border-b border-gray-700 pb-4">
-            Option 1: Log in with the Admin Discord Account (ID: {{ admin_id }})
-        </p>
-
-        <a href="{{ oauth_url }}" class="flex items-center justify-center w-full bg-indigo-600 hover:bg-indigo-700 text-white font-bold py-2.5 px-4 rounded-lg transition duration-300 shadow-md hover:shadow-lg">
-            Log In with Discord
-        </a>
-
-        <!-- Fallback Passphrase Section -->
-        <p class="text-gray-400 mt-6 mb-4 text-center border-b border-gray-700 pb-4">
-            Option 2: Log in with Fallback Passphrase
-        </p>
-        
-        <form method="POST" action="{{ url_for('login') }}">
-            <div class="mb-4">
-                <input type="password" name="passphrase" required
-                       class="w-full px-4 py-2 bg-gray-700 border border-gray-600 rounded-lg text-white focus:ring-green-500 focus:border-green-500 transition duration-150"
-                       placeholder="Enter Passphrase">
-            </div>
-            <button type="submit" class="w-full bg-green-600 hover:bg-green-700 text-white font-bold py-2.5 px-4 rounded-lg transition duration-300 shadow-md hover:shadow-lg">
-                Log In with Passphrase
-            </button>
-        </form>
-    </div>
-</body>
-</html>
-        """, 
-        oauth_url=oauth_url, 
+    return await render_template(
+        'login.html',
+        oauth_url=OAUTH_URL, 
         error=error,
         admin_id=DASHBOARD_ADMIN_USER_ID
     )
 
 @app.route('/oauth_callback')
-def oauth_callback():
+@rate_limited()
+async def oauth_callback():
     code = request.args.get('code')
     if not code:
         return redirect(url_for('login', error_msg='Authorization failed or was cancelled.'))
 
-    data = {'client_id': DISCORD_CLIENT_ID, 'client_secret': DISCORD_CLIENT_SECRET, 'grant_type': 'authorization_code', 'code': code, 'redirect_uri': REDIRECT_URI, 'scope': 'identify'}
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    
     try:
-        response = requests.post(f"{DISCORD_API_BASE_URL}/oauth2/token", data=data, headers=headers)
-        response.raise_for_status()
-        token_info = response.json()
-        access_token = token_info['access_token']
-        
-        user_response = requests.get(f"{DISCORD_API_BASE_URL}/users/@me", headers={'Authorization': f"Bearer {access_token}"})
-        user_response.raise_for_status()
-        user_info = user_response.json()
-        user_id = str(user_info['id'])
-
-        if user_id == DASHBOARD_ADMIN_USER_ID:
-            session['authenticated'] = True
-            session['discord_user_id'] = user_id
+        # Both calls run on the bot's loop and reuse its pooled keep-alive session
+        user_info = await _discord_oauth_identify(code)
+        user_id = int(user_info['id'])
+
+        if DASHBOARD_ADMIN_UID is not None and user_id == DASHBOARD_ADMIN_UID:
+            session['discord_user_id'] = str(user_id)
             return redirect(url_for('dashboard', status="Successfully logged in with Discord."))
         else:
             return redirect(url_for('logout', error_msg=f'Access denied. Your ID ({user_id}) does not match the configured Admin ID.'))
 
-    except HTTPError as e:
-        print(f"HTTP Error during OAuth flow: {e.response.status_code} - {e.response.text}")
-        return redirect(url_for('login', error_msg=f'Discord API error during login: {e.response.status_code}'))
+    except aiohttp.ClientResponseError as e:
+        logger.error("HTTP Error during OAuth flow: %s - %s", e.status, e.message)
+        return redirect(url_for('login', error_msg=f'Discord API error during login: {e.status}'))
     except Exception as e:
-        print(f"Unexpected error during OAuth flow: {e}")
+        logger.exception("Unexpected error during OAuth flow: %s", e)
         return redirect(url_for('login', error_msg='An unexpected error occurred during the login process.'))
 
 @app.route('/logout')
-def logout():
-    session.pop('discord_user_id', None)
-    session.pop('authenticated', None)
+async def logout():
+    session.clear() # Also drops the 'authenticated' flag older cookies still carry
     error_msg = request.args.get('error_msg', 'You have been successfully logged out.')
     return redirect(url_for('login', error_msg=error_msg))
 
 
+@app.route('/healthz')
+async def healthz():
+    """Unauthenticated liveness probe; the session interface hands it a null session, so no cookie is decoded."""
+    return 'ok', 200, {'Content-Type': 'text/plain', 'Cache-Control': 'no-store'}
+
+@app.errorhandler(413)
+async def request_too_large(e):
+    """Oversized form posts are refused before Quart parses them."""
+    return dashboard_result(error="Submitted form was too large.")
+
+GZIP_MIN_BYTES = 1024 # Below this the gzip header and CPU cost outweigh the savings
+GZIP_LEVEL = 5 # Tailwind-class HTML compresses ~5x already at mid levels
+
+@app.after_request
+async def gzip_html(response):
+    """Gzips rendered pages for clients that accept it; Hypercorn sends bodies as-is."""
+    if (response.status_code != 200 or response.mimetype != 'text/html'
+            or 'Content-Encoding' in response.headers or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+        return response
+    data = await response.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/')
 @login_required
-def home():
-    return redirect(url_for('dashboard'))
+async def home():
+    # Bare 302: skips redirect()'s HTML body for something load balancers may poll constantly
+    return '', 302, {'Location': endpoint_url('dashboard')}
 
 @app.route('/dashboard')
 @login_required
-def dashboard():
+async def dashboard():
     """Displays the bot configuration dashboard, fetching channels and message context dynamically."""
     
     # Fetch channels for dropdowns
-    channels = _get_guild_channels()
+    channels = await _get_guild_channels()
     
     # Handle context channel selection for the webhook panel
     # We use a query parameter to persist the context selection
     context_channel_id = request.args.get('context_channel_id')
     recent_messages = None
     
+    # The query string feeds a bot-token REST call, so anything but a snowflake is treated as unset
+    if context_channel_id and not is_snowflake(context_channel_id):
+        context_channel_id = None
     # Default context channel: use the ID of the first channel if none is set
     if not context_channel_id and channels:
         context_channel_id = channels[0]['id']
         
     if context_channel_id:
-        recent_messages = _get_recent_messages(context_channel_id)
+        recent_messages = await _get_recent_messages(context_channel_id)
     
-    config = CONFIG_CACHE.get(GUILD_ID, {})
-    log_id = config.get('log_channel_id', None)
-    word_filter_list = config.get('word_filter_list', [])
-    rr_messages = config.get('reaction_roles', {})
-    rr_count = len(rr_messages)
-    user_id = session.get('discord_user_id', 'Unknown')
+    config = CONFIG_CACHE[GUILD_ID]
+    log_id = str(config.log_channel_id) if config.log_channel_id else None # Channel IDs from the API are strings
+    word_filter_list = config.word_filter_list
+    rr_count = len(config.reaction_roles)
+    user_id = g.user_id
     
     status = request.args.get('status', None)
     error = request.args.get('error', None)
     
-    return render_template_string(
-        DASHBOARD_TEMPLATE,
+    return await render_template(
+        'dashboard.html',
         current_log_id=log_id,
         current_word_filter=word_filter_list,
         rr_count=rr_count,
+        config_persistent=CONFIG_STORE_PATH is not None,
         guild_id=GUILD_ID,
         status=status,
         error=error,
@@ -970,274 +1371,303 @@ def dashboard():
 
 # --- 4. DASHBOARD API ENDPOINTS (Direct Discord API Interactions) ---
 
+def dashboard_result(**args):
+    """Outcome of a dashboard action: JSON for the page's in-place fetch() submits, else a redirect that re-renders it."""
+    if request.headers.get('Accept') == 'application/json':
+        return {'status': args.get('status'), 'error': args.get('error')}
+    return redirect(url_for('dashboard', **args))
+
 def handle_api_error(e):
-    """Helper to parse API errors and redirect."""
+    """Helper to parse API errors and report them through dashboard_result."""
     error_message = "An unknown error occurred."
     try:
-        response_json = e.response.json()
+        response_json = json_loads(e.message)
         if 'message' in response_json:
-            error_message = f"Discord API Error ({e.response.status_code}): {response_json['message']}"
-    except:
-        error_message = f"HTTP Error {e.response.status_code}: Could not parse Discord response."
+            error_message = f"Discord API Error ({e.status}): {response_json['message']}"
+    except (ValueError, TypeError): # Decode errors from orjson and json both subclass ValueError; TypeError for non-object bodies
+        error_message = f"HTTP Error {e.status}: Could not parse Discord response."
         
-    return redirect(url_for('dashboard', error=error_message))
+    return dashboard_result(error=error_message)
 
 @app.route('/api/config', methods=['POST'])
-@login_required
-def api_update_config():
-    """Updates in-memory configuration (Log Channel and Word Filter List)."""
-    new_log_id_str = request.form.get('log_channel_id', '').strip()
-    word_filter_raw = request.form.get('word_filter_list', '').strip()
+@login_required # Outermost, so anonymous POSTs can't spend the admin's write budget
+@rate_limited()
+async def api_update_config():
+    """Updates the configuration (Log Channel and Word Filter List) and saves it to disk."""
+    form = await request.form
+    new_log_id_str = form.get('log_channel_id', '').strip()
+    word_filter_raw = form.get('word_filter_list', '').strip()
 
     # Log Channel validation (optional check, as dropdown enforces valid IDs)
-    if new_log_id_str and not new_log_id_str.isdigit():
-        return redirect(url_for('dashboard', error="Log Channel ID must be a number (the 18-digit Discord Channel ID)."))
+    if new_log_id_str and not is_snowflake(new_log_id_str):
+        return dashboard_result(error="Log Channel ID must be a number (the 18-digit Discord Channel ID).")
     
     # Word Filter processing
-    new_word_list = [w.strip().lower() for w in word_filter_raw.split(',') if w.strip()]
+    # Lowercase the whole field once; words stay comma-separated so multi-word phrases survive
+    new_word_list = [w for w in map(str.strip, word_filter_raw.lower().split(',')) if w]
     
-    CONFIG_CACHE[GUILD_ID]['log_channel_id'] = new_log_id_str if new_log_id_str else None
-    CONFIG_CACHE[GUILD_ID]['word_filter_list'] = new_word_list
+    bot.apply_dashboard_config(int(new_log_id_str) if new_log_id_str else None, new_word_list)
 
-    return redirect(url_for('dashboard', status="Configuration successfully updated!"))
+    return dashboard_result(status="Configuration successfully updated!")
 
 @app.route('/api/prune', methods=['POST'])
 @login_required
-def api_prune():
+async def api_prune():
     """Prunes messages using Discord's bulk delete endpoint."""
-    channel_id = request.form.get('channel_id')
-    count = int(request.form.get('count', 10))
+    form = await request.form
+    channel_id = form.get('channel_id')
+    try:
+        count = int(form.get('count', 10))
+    except ValueError:
+        return dashboard_result(error="Prune count must be a whole number.")
     
-    if not channel_id or not channel_id.isdigit():
-        return redirect(url_for('dashboard', error="Invalid Channel ID for Prune."))
+    if not channel_id or not is_snowflake(channel_id):
+        return dashboard_result(error="Invalid Channel ID for Prune.")
+    if not _known_channel(channel_id):
+        return dashboard_result(error=f"Channel {channel_id} is not in this server.")
     if count < 1 or count > 100:
-        return redirect(url_for('dashboard', error="Prune count must be between 1 and 100."))
+        return dashboard_result(error="Prune count must be between 1 and 100.")
     
     try:
-        # Fetch the message IDs to delete
-        messages_response = requests.get(
-            f"{DISCORD_API_BASE_URL}/channels/{channel_id}/messages?limit={count}",
-            headers=BOT_API_HEADERS
-        )
-        messages_response.raise_for_status()
-        messages = messages_response.json()
+        # A repeated submit must not delete the next batch of messages too
+        pruned = await _coalesced(('prune', channel_id, count), lambda: _prune_messages(channel_id, count))
         
-        message_ids = [msg['id'] for msg in messages]
+        return dashboard_result(status=f"Successfully pruned {pruned} messages in channel {channel_id}.")
 
-        # Use bulk delete endpoint
-        delete_response = requests.post(
-            f"{DISCORD_API_BASE_URL}/channels/{channel_id}/messages/bulk-delete",
-            headers=BOT_API_HEADERS,
-            json={"messages": message_ids}
-        )
-        delete_response.raise_for_status()
-        
-        return redirect(url_for('dashboard', status=f"Successfully pruned {len(message_ids)} messages in channel {channel_id}."))
-
-    except HTTPError as e:
+    except aiohttp.ClientResponseError as e:
         return handle_api_error(e)
     except Exception as e:
-        return redirect(url_for('dashboard', error=f"An unexpected error occurred: {e}"))
+        return dashboard_result(error=f"An unexpected error occurred: {e}")
 
 
 @app.route('/api/tempmute', methods=['POST'])
 @login_required
-def api_tempmute():
-    """Mutes a user using Discord's timeout feature."""
-    member_id = request.form.get('member_id')
-    duration = int(request.form.get('duration', 1))
-    unit = request.form.get('unit', 'minutes')
-    reason = request.form.get('reason', 'Muted from dashboard.')
+async def api_tempmute():
+    """Mutes one or more users (comma or newline separated) using Discord's timeout feature."""
+    form = await request.form
+    # dict.fromkeys drops repeated IDs but keeps the order they were entered in
+    member_ids = list(dict.fromkeys(form.get('member_id', '').replace(',', ' ').split()))
+    try:
+        duration = int(form.get('duration', 1))
+    except ValueError:
+        return dashboard_result(error="Mute duration must be a whole number.")
+    unit = form.get('unit', 'minutes')
+    reason = form.get('reason', 'Muted from dashboard.')
+    if duration < 1:
+        return dashboard_result(error="Mute duration must be at least 1.")
     
-    if not member_id or not member_id.isdigit():
-        return redirect(url_for('dashboard', error="Invalid Member ID for Mute."))
+    if not member_ids or not all(map(is_snowflake, member_ids)):
+        return dashboard_result(error="Invalid Member ID for Mute.")
+    if len(member_ids) > MAX_BULK_MUTE:
+        return dashboard_result(error=f"At most {MAX_BULK_MUTE} members can be muted at once.")
+    unknown = [member_id for member_id in member_ids if not _known_member(member_id)]
+    if unknown:
+        return dashboard_result(error=f"Not in this server: {', '.join(unknown)}.")
     
-    if unit == 'minutes': seconds = duration * 60
-    elif unit == 'hours': seconds = duration * 3600
-    elif unit == 'days': seconds = duration * 86400
-    else: seconds = 0
+    seconds = duration_to_seconds(duration, unit)
+    if not seconds:
+        return dashboard_result(error="Invalid duration unit for Mute.")
     
-    if seconds > (28 * 86400):
-        return redirect(url_for('dashboard', error="Timeout duration cannot exceed 28 days."))
-
-    timeout_until = (time.time() + seconds)
-    timeout_dt = (discord.utils.utcnow() + timedelta(seconds=seconds)).isoformat()
+    if seconds > MAX_TIMEOUT_SECONDS:
+        return dashboard_result(error="Timeout duration cannot exceed 28 days.")
 
     try:
-        # 1. Apply Discord Timeout
-        requests.patch(
-            f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}/members/{member_id}",
-            headers=BOT_API_HEADERS,
-            json={
-                "communication_disabled_until": timeout_dt,
-                "reason": reason
-            }
-        ).raise_for_status()
-
-        # 2. Update bot's in-memory silent mute (for message deletion)
-        # Note: This relies on Flask and bot running in the same process
-        bot.muted_users[int(member_id)] = timeout_until
+        # Apply Discord Timeout (Discord itself blocks the member's messages); all PATCHes are in flight together
+        failures = await _timeout_members(member_ids, seconds, reason)
         
-        return redirect(url_for('dashboard', status=f"Successfully timed out user {member_id} for {duration} {unit}."))
-
-    except HTTPError as e:
+        if len(member_ids) == 1:
+            if failures:
+                raise failures[member_ids[0]]
+            return dashboard_result(status=f"Successfully timed out user {member_ids[0]} for {duration} {unit}.")
+        if failures:
+            done = len(member_ids) - len(failures)
+            return dashboard_result(error=f"Timed out {done} of {len(member_ids)} users; failed for: {', '.join(failures)}.")
+        return dashboard_result(status=f"Successfully timed out {len(member_ids)} users for {duration} {unit}.")
+
+    except aiohttp.ClientResponseError as e:
         return handle_api_error(e)
     except Exception as e:
-        return redirect(url_for('dashboard', error=f"An unexpected error occurred: {e}"))
+        return dashboard_result(error=f"An unexpected error occurred: {e}")
 
 
 @app.route('/api/unmute', methods=['POST'])
 @login_required
-def api_unmute():
-    """Removes a user's Discord Timeout and internal silent mute."""
-    member_id = request.form.get('member_id')
+async def api_unmute():
+    """Removes a user's Discord Timeout."""
+    form = await request.form
+    member_id = form.get('member_id')
     
-    if not member_id or not member_id.isdigit():
-        return redirect(url_for('dashboard', error="Invalid Member ID for Unmute."))
+    if not member_id or not is_snowflake(member_id):
+        return dashboard_result(error="Invalid Member ID for Unmute.")
+    if not _known_member(member_id):
+        return dashboard_result(error=f"User {member_id} is not in this server.")
         
     try:
-        # 1. Remove Discord Timeout
-        requests.patch(
-            f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}/members/{member_id}",
-            headers=BOT_API_HEADERS,
+        # Remove Discord Timeout
+        await bot_api(
+            'PATCH',
+            f"{DISCORD_MEMBERS_URL}/{member_id}",
             json={
                 "communication_disabled_until": None,
                 "reason": "Unmuted from dashboard."
             }
-        ).raise_for_status()
-
-        # 2. Remove from bot's in-memory silent mute
-        if int(member_id) in bot.muted_users:
-            del bot.muted_users[int(member_id)]
+        )
         
-        return redirect(url_for('dashboard', status=f"Successfully unmuted user {member_id}."))
+        return dashboard_result(status=f"Successfully unmuted user {member_id}.")
 
-    except HTTPError as e:
+    except aiohttp.ClientResponseError as e:
         return handle_api_error(e)
     except Exception as e:
-        return redirect(url_for('dashboard', error=f"An unexpected error occurred: {e}"))
+        return dashboard_result(error=f"An unexpected error occurred: {e}")
 
 
 @app.route('/api/kick_ban', methods=['POST'])
 @login_required
-def api_kick_ban():
+async def api_kick_ban():
     """Handles kick, temp ban, and unban actions."""
-    member_id = request.form.get('member_id')
-    action_type = request.form.get('action_type')
-    reason = request.form.get('reason', 'Action executed from dashboard.')
-
-    if not member_id or not member_id.isdigit():
-        return redirect(url_for('dashboard', error="Invalid Member ID."))
+    form = await request.form
+    member_id = form.get('member_id')
+    action_type = form.get('action_type')
+    reason = form.get('reason', 'Action executed from dashboard.')
+
+    if not member_id or not is_snowflake(member_id):
+        return dashboard_result(error="Invalid Member ID.")
+    if action_type == 'tempban':
+        # Only tempbans use the field, so a cleared one must not break kicks and unbans
+        try:
+            ban_days = int(form.get('ban_days', 1))
+        except ValueError:
+            return dashboard_result(error="Temporary ban duration must be a whole number of days.")
+        if not 1 <= ban_days <= MAX_TEMPBAN_DAYS:
+            return dashboard_result(error=f"Temporary ban duration must be between 1 and {MAX_TEMPBAN_DAYS} days.")
+    # Bans and unbans can target users who have left, so only kicks need the member to be present
+    if action_type == 'kick' and not _known_member(member_id):
+        return dashboard_result(error=f"User {member_id} is not in this server.")
 
     try:
         status_message = ""
         if action_type == 'kick':
-            requests.delete(
-                f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}/members/{member_id}",
-                headers=BOT_API_HEADERS,
+            await bot_api(
+                'DELETE',
+                f"{DISCORD_MEMBERS_URL}/{member_id}",
                 params={'reason': reason}
-            ).raise_for_status()
+            )
             status_message = f"Successfully Kicked user {member_id}."
 
         elif action_type == 'tempban':
             # delete_message_days=1 ensures 1 day of messages are deleted
-            requests.put(
-                f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}/bans/{member_id}",
-                headers=BOT_API_HEADERS,
+            await bot_api(
+                'PUT',
+                f"{DISCORD_BANS_URL}/{member_id}",
                 json={"delete_message_days": 1},
                 params={'reason': reason}
-            ).raise_for_status()
-            status_message = f"Successfully Banned user {member_id} (1 day of messages deleted)."
+            )
+
+            # Hand the unban to the bot's scheduler
+            bot.schedule_unban(int(member_id), time.time() + ban_days * 86400)
+            status_message = f"Successfully Banned user {member_id} for {ban_days} day(s) (1 day of messages deleted)."
 
         elif action_type == 'unban':
-            requests.delete(
-                f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}/bans/{member_id}",
-                headers=BOT_API_HEADERS,
+            await bot_api(
+                'DELETE',
+                f"{DISCORD_BANS_URL}/{member_id}",
                 params={'reason': "Unbanned from dashboard."}
-            ).raise_for_status()
+            )
+            bot.cancel_unban(int(member_id))
             status_message = f"Successfully Unbanned user {member_id}."
             
-        return redirect(url_for('dashboard', status=status_message))
+        return dashboard_result(status=status_message)
 
-    except HTTPError as e:
+    except aiohttp.ClientResponseError as e:
         return handle_api_error(e)
     except Exception as e:
-        return redirect(url_for('dashboard', error=f"An unexpected error occurred: {e}"))
+        return dashboard_result(error=f"An unexpected error occurred: {e}")
 
 
 @app.route('/api/change_nickname', methods=['POST'])
 @login_required
-def api_change_nickname():
+async def api_change_nickname():
     """Changes the bot's nickname in the guild."""
-    nickname = request.form.get('nickname')
+    form = await request.form
+    nickname = form.get('nickname')
     
     if not nickname:
-        return redirect(url_for('dashboard', error="Nickname cannot be empty."))
+        return dashboard_result(error="Nickname cannot be empty.")
 
     try:
         current_bot_user_id = bot.user.id if bot.is_ready() else "@me" 
 
-        requests.patch(
-            f"{DISCORD_API_BASE_URL}/guilds/{GUILD_ID}/members/{current_bot_user_id}",
-            headers=BOT_API_HEADERS,
+        await bot_api(
+            'PATCH',
+            f"{DISCORD_MEMBERS_URL}/{current_bot_user_id}",
             json={"nick": nickname}
-        ).raise_for_status()
+        )
         
-        return redirect(url_for('dashboard', status=f"Bot nickname successfully changed to '{nickname}'."))
+        return dashboard_result(status=f"Bot nickname successfully changed to '{nickname}'.")
 
-    except HTTPError as e:
+    except aiohttp.ClientResponseError as e:
         return handle_api_error(e)
     except Exception as e:
-        return redirect(url_for('dashboard', error=f"An unexpected error occurred: {e}"))
+        return dashboard_result(error=f"An unexpected error occurred: {e}")
 
 
 @app.route('/api/send_message', methods=['POST'])
 @login_required
-def api_send_message():
+async def api_send_message():
     """Sends a message using a webhook for username/avatar impersonation."""
-    channel_id = request.form.get('channel_id')
-    message = request.form.get('message')
-    username = request.form.get('username')
-    avatar_url = request.form.get('avatar_url')
+    form = await request.form
+    channel_id = form.get('channel_id')
+    message = form.get('message')
+    username = form.get('username')
+    avatar_url = form.get('avatar_url')
     
-    if not channel_id or not channel_id.isdigit():
-        return redirect(url_for('dashboard', error="Invalid Channel ID for Message Send."))
+    if not channel_id or not is_snowflake(channel_id):
+        return dashboard_result(error="Invalid Channel ID for Message Send.")
+    if not _known_channel(channel_id):
+        return dashboard_result(error=f"Channel {channel_id} is not in this server.")
     if not message:
-        return redirect(url_for('dashboard', error="Message content cannot be empty."))
+        return dashboard_result(error="Message content cannot be empty.")
 
     try:
-        # 1. Get or Create the Webhook
-        webhook_id, webhook_token = _get_or_create_webhook(channel_id)
-        
         payload = {"content": message}
         if username:
             payload["username"] = username
         if avatar_url:
             payload["avatar_url"] = avatar_url
 
-        # 2. Execute Webhook
-        requests.post(
-            f"{DISCORD_API_BASE_URL}/webhooks/{webhook_id}/{webhook_token}",
-            json=payload
-        ).raise_for_status()
+        # Get or create the webhook, then execute it
+        await _send_webhook_message(channel_id, payload)
         
         # Redirect, but keep the current context channel selected
-        return redirect(url_for('dashboard', status=f"Impersonated message successfully sent to channel {channel_id}.", context_channel_id=channel_id))
+        return dashboard_result(status=f"Impersonated message successfully sent to channel {channel_id}.", context_channel_id=channel_id)
 
-    except HTTPError as e:
+    except aiohttp.ClientResponseError as e:
         return handle_api_error(e)
     except Exception as e:
         # Catch exceptions thrown by _get_or_create_webhook as well
-        return redirect(url_for('dashboard', error=f"An unexpected error occurred during webhook operation: {e}"))
-
-
-def run_web_server():
-    """Runs the Flask web server in a separate thread."""
-    port = int(os.environ.get('PORT', 5000))
-    app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'a_very_secret_key_for_hyperos') 
+        return dashboard_result(error=f"An unexpected error occurred during webhook operation: {e}")
+
+
+async def run_web_server(shutdown_trigger=None):
+    """Serves the Quart dashboard through Hypercorn on the bot's asyncio loop."""
+    app.secret_key = WEB_SECRET_KEY
+    if not app.secret_key:
+        # A random per-process key is safe, but every restart logs dashboard users out
+        app.secret_key = secrets.token_urlsafe(48)
+        logger.warning("FLASK_SECRET_KEY not set; using a random key, dashboard sessions will not survive restarts.")
+    app.config.update(SESSION_COOKIE_HTTPONLY=True, SESSION_COOKIE_SAMESITE='Lax',
+                      SESSION_COOKIE_SECURE=SESSION_COOKIE_SECURE)
+
+    config = HypercornConfig()
+    config.bind = [f"0.0.0.0:{WEB_PORT}"]
+    # Outlive the hosting proxy's ~60s idle timeout so it reuses upstream connections instead of racing our close
+    config.keep_alive_timeout = 65
     
-    print(f"Web server starting with Redirect URI: {REDIRECT_URI}")
-    app.run(host='0.0.0.0', port=port)
+    print(f"Web server starting on port {WEB_PORT} with Redirect URI: {REDIRECT_URI}")
+    # Handlers are coroutines on this loop: they await the bot's helpers directly, no thread hops
+    # Rewrites the client address from X-Forwarded-For so request.remote_addr (used by rate_limited) is the real client
+    asgi_app = ProxyFixMiddleware(app, mode='legacy', trusted_hops=PROXY_TRUSTED_HOPS) if PROXY_TRUSTED_HOPS else app
+    await serve(asgi_app, config, shutdown_trigger=shutdown_trigger)
 
 if __name__ == "__main__":
     
@@ -1246,11 +1676,22 @@ if __name__ == "__main__":
     elif DISCORD_CLIENT_ID == '123456789012345678' or DISCORD_CLIENT_SECRET == 'your_super_secret_client_secret':
         print("ERROR: Discord OAuth credentials are using default values. Please set DISCORD_CLIENT_ID and DISCORD_CLIENT_SECRET environment variables.")
     else:
-        # Start the Flask server in a background thread
-        server_thread = threading.Thread(target=run_web_server)
-        server_thread.daemon = True
-        server_thread.start()
-        print(f"Web server started on port {os.environ.get('PORT', 5000)} for dashboard access.")
-
-        # Run the Discord bot
-        bot.run(BOT_TOKEN)
+        # uvloop is POSIX-only; Windows keeps the default asyncio loop.
+        if sys.platform != 'win32':
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+        # discord.py's stream handler and formatter, but fed from a queue: the event loop only
+        # enqueues records, and one listener thread does the stdout writes.
+        discord.utils.setup_logging(root=True)
+        root_logger = logging.getLogger()
+        log_queue = queue.SimpleQueue()
+        log_listener = logging.handlers.QueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)
+        root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+        log_listener.start()
+
+        # Run the Discord bot (the dashboard is started from setup_hook)
+        try:
+            bot.run(BOT_TOKEN, log_handler=None) # Logging is already configured above
+        finally:
+            log_listener.stop()
@@ -0,0 +1,20 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+
+
+def test_healthz_returns_ok_without_a_session_cookie():
+    bot.app.secret_key = 'test-secret'
+
+    async def probe():
+        response = await bot.app.test_client().get('/healthz')
+        return response.status_code, await response.get_data(as_text=True), response.headers.getlist('Set-Cookie')
+
+    status, body, cookies = asyncio.run(probe())
+    assert status == 200
+    assert body == 'ok'
+    assert cookies == []